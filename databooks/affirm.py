@@ -1,13 +1,13 @@
 """Functions to safely evaluate strings and inspect notebook."""
 import ast
-from collections import abc
-from copy import deepcopy
-from itertools import compress
+from collections import UserDict, UserList
 from pathlib import Path
-from typing import Any, Callable, Dict, Iterable, List, Tuple
+from types import CodeType, MappingProxyType
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union, cast
 
 from databooks import JupyterNotebook
 from databooks.data_models.base import DatabooksBase
+from databooks.data_models.view import ModelView
 from databooks.logging import get_logger, set_verbose
 
 logger = get_logger(__file__)
@@ -24,6 +24,11 @@ _ALLOWED_BUILTINS = (
     range,
     sorted,
 )
+_SAFE_GETATTR = "__databooks_getattr__"
+CompiledExprs = List[Tuple[str, CodeType]]
+_NB_VARIABLES = ("nb", "raw_cells", "md_cells", "code_cells", "exec_cells")
+# Methods of models (and views) that are valid attributes, besides their fields
+_MODEL_METHODS = ("dict",)
 _ALLOWED_NODES = (
     ast.Add,
     ast.And,
@@ -83,12 +88,13 @@ class DatabooksParser(ast.NodeVisitor):
 
     def __init__(self, **variables: Any) -> None:
         """Instantiate with variables and callables (built-ins) scope."""
-        # https://github.com/python/mypy/issues/3728
-        self.builtins = {b.__name__: b for b in _ALLOWED_BUILTINS}  # type: ignore
-        self.names = deepcopy(variables) or {}
+        self.builtins = _SAFE_BUILTINS
+        # No need to copy the variables - attributes are only read via `_safe_getattr`
+        self.names = dict(variables)
         self.scope = {
             **self.names,
             "__builtins__": self.builtins,
+            _SAFE_GETATTR: _safe_getattr,
         }
 
     @staticmethod
@@ -100,29 +106,25 @@ class DatabooksParser(ast.NodeVisitor):
         return not any(isinstance(f, ast.comprehension) for f in value)
 
     @staticmethod
-    def _allowed_attr(obj: Any, attr: str, is_dynamic: bool = False) -> None:
+    def _allowed_attr(obj: Any, attr: str) -> None:
         """
-        Check that attribute is a key of `databooks.data_models.base.DatabooksBase`.
+        Check that attribute is a field of model (or of its read-only view), or one of
+         its methods that return copies of the values (i.e.: `dict`).
 
-        If `obj` is an iterable and was computed dynamically (that is, not originally in
-         scope but computed from a comprehension), check attributes for all elements in
-         the iterable.
+        Attributes are checked when evaluating (see `databooks.affirm._safe_getattr`),
+         since the objects in scope are only known then (i.e.: values from
+         comprehensions).
         """
-        allowed_attrs = list(dict(obj).keys()) if isinstance(obj, DatabooksBase) else ()
-        if isinstance(obj, abc.Iterable) and is_dynamic:
-            for el in obj:
-                DatabooksParser._allowed_attr(obj=el, attr=attr)
-        else:
-            if attr not in allowed_attrs:
-                raise ValueError(
-                    "Expected attribute to be one of"
-                    f" `{allowed_attrs}`, got `{attr}` for {obj}."
-                )
-
-    def _get_iter(self, node: ast.AST) -> Iterable:
-        """Use `DatabooksParser.safe_eval_ast` to get the iterable object."""
-        tree = ast.Expression(body=node)
-        return iter(self.safe_eval_ast(tree))
+        allowed_attrs = (
+            [*dict(obj).keys(), *_MODEL_METHODS]
+            if isinstance(obj, (DatabooksBase, ModelView))
+            else ()
+        )
+        if attr not in allowed_attrs:
+            raise ValueError(
+                "Expected attribute to be one of"
+                f" `{allowed_attrs}`, got `{attr}` for {obj}."
+            )
 
     def generic_visit(self, node: ast.AST) -> None:
         """
@@ -151,7 +153,8 @@ class DatabooksParser(ast.NodeVisitor):
                 "Expected `ast.comprehension`'s target to be `ast.Name`, got"
                 f" `ast.{type(node.target).__name__}`."
             )
-        self.names[node.target.id] = self._get_iter(node.iter)
+        # Values are only known when evaluating - attributes are checked at runtime
+        self.names[node.target.id] = None
         self.generic_visit(node)
 
     def visit_Attribute(self, node: ast.Attribute) -> None:
@@ -161,12 +164,8 @@ class DatabooksParser(ast.NodeVisitor):
                 "Expected attribute to be one of `ast.Name`, `ast.Attribute` or"
                 f" `ast.Subscript`, got `ast.{type(node.value).__name__}`."
             )
-        if isinstance(node.value, ast.Name):
-            self._allowed_attr(
-                obj=self.names[node.value.id],
-                attr=node.attr,
-                is_dynamic=node.value.id in (self.names.keys() - self.scope.keys()),
-            )
+        if isinstance(node.value, ast.Name) and node.value.id not in self.names:
+            raise KeyError(node.value.id)
         self.generic_visit(node)
 
     def visit_Name(self, node: ast.Name) -> None:
@@ -178,11 +177,25 @@ class DatabooksParser(ast.NodeVisitor):
             )
         self.generic_visit(node)
 
-    def safe_eval_ast(self, ast_tree: ast.AST) -> Any:
-        """Evaluate safe AST trees only (raise errors otherwise)."""
+    def safe_compile_ast(self, ast_tree: ast.Expression) -> CodeType:
+        """Compile safe AST trees only (raise errors otherwise)."""
         self.visit(ast_tree)
-        exe = compile(ast_tree, filename="", mode="eval")
-        return eval(exe, self.scope)
+        safe_tree = ast.fix_missing_locations(_SafeAttributes().visit(ast_tree))
+        return compile(safe_tree, filename="", mode="eval")
+
+    def safe_compile(self, src: str) -> CodeType:
+        """
+        Compile strings that are safe only (raise errors otherwise).
+
+        The resulting code can be evaluated against different variables (with the same
+         names as the parser's) with `databooks.affirm.safe_eval_code`.
+        """
+        ast_tree = ast.parse(src, mode="eval")
+        return self.safe_compile_ast(ast_tree)
+
+    def safe_eval_ast(self, ast_tree: ast.Expression) -> Any:
+        """Evaluate safe AST trees only (raise errors otherwise)."""
+        return eval(self.safe_compile_ast(ast_tree), self.scope)
 
     def safe_eval(self, src: str) -> Any:
         """
@@ -192,23 +205,140 @@ class DatabooksParser(ast.NodeVisitor):
          `databooks.affirm._ALLOWED_NODES` and built-ins from
          `databooks.affirm._ALLOWED_BUILTINS`.
         """
-        ast_tree = ast.parse(src, mode="eval")
-        return self.safe_eval_ast(ast_tree)
+        return eval(self.safe_compile(src), self.scope)
+
+
+class _SafeAttributes(ast.NodeTransformer):
+    """Replace attributes by calls that check them when evaluating."""
+
+    def visit_Attribute(self, node: ast.Attribute) -> ast.AST:
+        """Replace `value.attr` by `__databooks_getattr__(value, 'attr')`."""
+        self.generic_visit(node)
+        return ast.copy_location(
+            ast.Call(
+                func=ast.Name(id=_SAFE_GETATTR, ctx=ast.Load()),
+                args=[node.value, ast.Constant(value=node.attr)],
+                keywords=[],
+            ),
+            node,
+        )
+
+
+def _frozen(obj: Any) -> Any:
+    """Get read-only view of mutable containers, without copying their elements."""
+    if isinstance(obj, (list, UserList)):
+        return tuple(obj)
+    if isinstance(obj, (dict, UserDict)):
+        return MappingProxyType(obj)
+    if isinstance(obj, set):
+        return frozenset(obj)
+    return obj
+
+
+def _safe_getattr(obj: Any, attr: str) -> Any:
+    """
+    Get attribute without allowing expressions to modify objects in scope.
+
+    For `databooks.data_models.base.DatabooksBase` models and their read-only views
+     (`databooks.data_models.view.ModelView`), only fields (and `dict`) are valid. For
+     other objects, only public attributes of their read-only view are valid (i.e.:
+     `dict.get` but not `dict.pop`). Since expressions cannot assign values, this
+     makes the scope read-only without copying it.
+    """
+    if isinstance(obj, DatabooksBase):
+        DatabooksParser._allowed_attr(obj=obj, attr=attr)
+        return getattr(obj, attr)
+    if isinstance(obj, ModelView):
+        DatabooksParser._allowed_attr(obj=obj, attr=attr)
+        return obj._get(attr) if attr in obj._index else getattr(obj, attr)
+    view = _frozen(obj)
+    if attr.startswith("_") or not hasattr(view, attr):
+        raise ValueError(
+            f"Expected public attribute of read-only `{type(view).__name__}`, got"
+            f" `{attr}` for {obj}."
+        )
+    return getattr(view, attr)
+
+
+def _safe_getattr_builtin(obj: Any, name: str, *default: Any) -> Any:
+    """Replace built-in `getattr` with `databooks.affirm._safe_getattr`."""
+    try:
+        return _safe_getattr(obj, name)
+    except (AttributeError, ValueError):
+        if default:
+            return default[0]
+        raise
+
+
+def _safe_hasattr_builtin(obj: Any, name: str) -> bool:
+    """Replace built-in `hasattr` with `databooks.affirm._safe_getattr`."""
+    try:
+        _safe_getattr(obj, name)
+    except (AttributeError, ValueError):
+        return False
+    return True
+
+
+_SAFE_BUILTINS = {
+    # https://github.com/python/mypy/issues/3728
+    **{b.__name__: b for b in _ALLOWED_BUILTINS},  # type: ignore
+    "getattr": _safe_getattr_builtin,
+    "hasattr": _safe_hasattr_builtin,
+}
+
 
+def safe_eval_code(code: CodeType, **variables: Any) -> Any:
+    """Evaluate code from `databooks.affirm.DatabooksParser.safe_compile`."""
+    scope = {
+        **variables,
+        "__builtins__": _SAFE_BUILTINS,
+        _SAFE_GETATTR: _safe_getattr,
+    }
+    return eval(code, scope)
+
+
+def compile_exprs(exprs: Iterable[str]) -> CompiledExprs:
+    """
+    Validate and compile expressions to be evaluated on notebooks.
 
-def affirm(nb_path: Path, exprs: List[str], verbose: bool = False) -> bool:
+    :param exprs: Expressions with checks to be evaluated on notebooks
+    :return: Pairs of expressions and respective compiled code, in the same order
+     (repeated expressions are compiled once, but still evaluated for each repetition)
+    """
+    exprs = list(exprs)
+    parser = DatabooksParser(**dict.fromkeys(_NB_VARIABLES))
+    codes = {expr: parser.safe_compile(expr) for expr in dict.fromkeys(exprs)}
+    return [(expr, codes[expr]) for expr in exprs]
+
+
+def _compiled(exprs: Union[List[str], CompiledExprs]) -> CompiledExprs:
+    """Compile expressions, unless they are already compiled."""
+    if all(isinstance(expr, tuple) for expr in exprs):
+        return cast(CompiledExprs, exprs)
+    return compile_exprs(cast(List[str], exprs))
+
+
+def affirm(
+    nb_path: Path,
+    exprs: Union[List[str], CompiledExprs],
+    verbose: bool = False,
+) -> bool:
     """
     Return whether notebook passed all checks (expressions).
 
     :param nb_path: Path of notebook file
-    :param exprs: Expression with check to be evaluated on notebook
+    :param exprs: Expression with check to be evaluated on notebook - can also be
+     compiled with `databooks.affirm.compile_exprs` (compile once, for many notebooks)
     :param verbose: Log failed tests for notebook
     :return: Evaluated expression cast as a `bool`
     """
     if verbose:
         set_verbose(logger)
 
-    nb = JupyterNotebook.parse_file(nb_path)
+    exprs = _compiled(exprs)
+
+    # Notebook is only read - outputs are only deserialized if expressions access them
+    nb = JupyterNotebook.load_view(nb_path)
     variables: Dict[str, Any] = {
         "nb": nb,
         "raw_cells": [c for c in nb.cells if c.cell_type == "raw"],
@@ -220,15 +350,14 @@ def affirm(nb_path: Path, exprs: List[str], verbose: bool = False) -> bool:
             if c.cell_type == "code" and c.execution_count is not None
         ],
     }
-    databooks_parser = DatabooksParser(**variables)
-    is_ok = [bool(databooks_parser.safe_eval(expr)) for expr in exprs]
+    is_ok = [bool(safe_eval_code(code, **variables)) for _, code in exprs]
     n_fail = sum([not ok for ok in is_ok])
 
     logger.info(f"{nb_path} failed {n_fail} of {len(is_ok)} checks.")
     logger.debug(
         str(nb_path)
         + (
-            f" failed {list(compress(exprs, (not ok for ok in is_ok)))}."
+            f" failed {[expr for (expr, _), ok in zip(exprs, is_ok) if not ok]}."
             if n_fail > 0
             else " succeeded all checks."
         )
@@ -239,6 +368,7 @@ def affirm(nb_path: Path, exprs: List[str], verbose: bool = False) -> bool:
 def affirm_all(
     nb_paths: List[Path],
     *,
+    exprs: Union[List[str], CompiledExprs],
     progress_callback: Callable[[], None] = lambda: None,
     **affirm_kwargs: Any,
 ) -> List[bool]:
@@ -246,12 +376,16 @@ def affirm_all(
     Clear metadata for multiple notebooks at notebooks and cell level.
 
     :param nb_paths: Paths of notebooks to assert metadata
+    :param exprs: Expressions with checks to be evaluated on notebooks - compiled only
+     once for all notebooks
     :param progress_callback: Callback function to report progress
     :param affirm_kwargs: Keyword arguments to be passed to `databooks.affirm.affirm`
     :return: Whether the notebooks contained or not the desired metadata
     """
+    exprs = _compiled(exprs)  # validate and compile once for all notebooks
+
     checks = []
     for nb_path in nb_paths:
-        checks.append(affirm(nb_path, **affirm_kwargs))
+        checks.append(affirm(nb_path, exprs=exprs, **affirm_kwargs))
         progress_callback()
     return checks
@@ -0,0 +1,105 @@
+"""Content-hash cache of notebooks that need no changes."""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Sequence
+
+from databooks.common import find_common_parent
+from databooks.git_utils import get_repo
+from databooks.logging import get_logger
+from databooks.version import __version__
+
+CACHE_DIR = ".databooks_cache"
+
+logger = get_logger(__file__)
+
+
+def get_cache_dir(paths: Sequence[Path]) -> Path:
+    """Get the cache directory - at the repo root or at the common parent of `paths`."""
+    common_path = find_common_parent(paths=paths)
+    repo = get_repo(common_path)
+    if repo is not None and repo.working_dir is not None:
+        return Path(repo.working_dir) / CACHE_DIR
+    return (common_path if common_path.is_dir() else common_path.parent) / CACHE_DIR
+
+
+class NotebookCache:
+    """
+    On-disk manifest of notebook content hashes.
+
+    Entries are keyed by the file contents and the options used to process them, so any
+     change to either invalidates the entry. Once `max_entries` is reached the least
+     recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: Path, name: str, max_entries: int = 50_000) -> None:
+        """Load manifest `name` from `cache_dir` (empty if missing or corrupted)."""
+        if max_entries < 1:
+            raise ValueError(
+                f"Expected `max_entries` to be a positive integer, got {max_entries}."
+            )
+        self.cache_dir = cache_dir
+        self.path = cache_dir / f"{name}.json"
+        self.max_entries = max_entries
+        # Dictionaries keep insertion order - first keys are the least recently used
+        self.entries: Dict[str, None] = dict.fromkeys(self._load())
+
+    def _load(self) -> Iterable[str]:
+        """Read the keys from the manifest file."""
+        if not self.path.is_file():
+            return ()
+        try:
+            manifest = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            logger.debug(f"Could not read cache at {self.path} - ignoring it.")
+            return ()
+        if manifest.get("version") != __version__:
+            logger.debug(f"Cache at {self.path} is from another version - ignoring it.")
+            return ()
+        return manifest.get("entries", ())
+
+    @staticmethod
+    def key(path: Path, **options: Any) -> str:
+        """Compute the cache key from file contents and processing options."""
+        normalized = {
+            k: sorted(v) if isinstance(v, (list, tuple, set)) else v
+            for k, v in options.items()
+        }
+        digest = hashlib.sha256(
+            json.dumps([__version__, normalized], sort_keys=True).encode()
+        )
+        digest.update(path.read_bytes())
+        return digest.hexdigest()
+
+    def __contains__(self, key: object) -> bool:
+        """Check whether `key` is cached, marking it as recently used."""
+        if key not in self.entries:
+            return False
+        self.entries[key] = self.entries.pop(key)  # type: ignore[index]
+        return True
+
+    def __len__(self) -> int:
+        """Get number of cached entries."""
+        return len(self.entries)
+
+    def add(self, key: str) -> None:
+        """Add entry to cache, evicting the least recently used ones if needed."""
+        self.entries.pop(key, None)
+        self.entries[key] = None
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def save(self) -> None:
+        """Write the manifest to disk."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        gitignore = self.cache_dir / ".gitignore"
+        if not gitignore.exists():
+            gitignore.write_text("# Created by databooks\n*\n")
+
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(
+            json.dumps({"version": __version__, "entries": list(self.entries)})
+        )
+        tmp_path.replace(self.path)
+        logger.debug(f"Saved {len(self)} cache entries to {self.path}.")
@@ -1,7 +1,8 @@
 """Main CLI application."""
+import os
 from itertools import compress
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, cast
 
 import tomli
 from rich.progress import (
@@ -15,12 +16,19 @@ from rich.prompt import Confirm
 from typer import Argument, BadParameter, Context, Exit, Option, Typer, echo
 
 from databooks.affirm import affirm_all
-from databooks.common import expand_paths
+from databooks.cache import CACHE_DIR, get_cache_dir
+from databooks.common import expand_paths, find_common_parent
 from databooks.config import TOML_CONFIG_FILE, get_config
 from databooks.conflicts import conflicts2nbs, path2conflicts
-from databooks.git_utils import get_nb_diffs
+from databooks.data_models.alignment import DiffAlgorithm
+from databooks.git_utils import (
+    get_changed_files,
+    get_repo,
+    get_repo_files,
+    iter_nb_diffs,
+)
 from databooks.logging import get_logger
-from databooks.metadata import clear_all
+from databooks.metadata import ClearEngine, clear_all
 from databooks.recipes import Recipe
 from databooks.tui import ImgFmt, diffs2rich, nbs2rich
 from databooks.version import __version__
@@ -74,13 +82,41 @@ def _config_callback(ctx: Context, config_path: Optional[Path]) -> Optional[Path
     return config_path
 
 
-def _check_paths(paths: List[Path], ignore: List[str]) -> List[Path]:
+def _check_paths(
+    paths: List[Path],
+    ignore: List[str],
+    gitignore: bool = False,
+    changed_since: Optional[str] = None,
+    staged: bool = False,
+) -> List[Path]:
     """Check that notebooks exist retrieve the file paths."""
     if any(path.suffix not in ("", ".ipynb") for path in paths):
         raise BadParameter(
             "Expected either notebook files, a directory or glob expression."
         )
-    nb_paths = expand_paths(paths=paths, ignore=ignore)
+    if changed_since is not None and staged:
+        raise BadParameter("Cannot use both `--changed-since` and `--staged`.")
+    only_changed = changed_since is not None or staged
+    repo = (
+        get_repo(find_common_parent(paths=paths)) if gitignore or only_changed else None
+    )
+    files = None
+    if repo is not None:
+        files = (
+            get_changed_files(repo, changed_since, staged=staged, paths=paths)
+            if only_changed
+            else get_repo_files(repo, paths=paths)
+        )
+    elif only_changed:
+        raise BadParameter(
+            "Expected paths in a git repo to get changed notebooks (for"
+            " `--changed-since` or `--staged`)."
+        )
+    nb_paths = expand_paths(paths=paths, ignore=ignore, files=files)
+    if nb_paths and only_changed:
+        # Notebook paths passed explicitly must also have changed
+        changed = set(cast(List[Path], files))
+        nb_paths = [p for p in nb_paths if p.resolve() in changed]
     if not nb_paths:
         logger.info(
             f"No notebooks found in {[p.resolve() for p in paths]}. Nothing to do."
@@ -116,6 +152,15 @@ def callback(  # noqa: D103
 def meta(
     paths: List[Path] = Argument(..., is_eager=True, help="Path(s) of notebook files"),
     ignore: List[str] = Option(["!*"], help="Glob expression(s) of files to ignore"),
+    gitignore: bool = Option(
+        True, help="Whether to skip git-ignored files (when inside a git repo)"
+    ),
+    changed_since: Optional[str] = Option(
+        None, help="Only process notebooks changed since git reference (hash, branch)"
+    ),
+    staged: bool = Option(
+        False, "--staged", help="Only process notebooks with changes staged in git"
+    ),
     prefix: str = Option("", help="Prefix to add to filepath when writing files"),
     suffix: str = Option("", help="Suffix to add to filepath when writing files"),
     rm_outs: bool = Option(False, help="Whether to remove cell outputs"),
@@ -132,6 +177,22 @@ def meta(
         "--check",
         help="Don't write files but check whether there is unwanted metadata",
     ),
+    jobs: Optional[int] = Option(
+        None,
+        "--jobs",
+        "-j",
+        min=1,
+        help="Number of parallel processes to use (defaults to the number of CPUs)",
+    ),
+    engine: ClearEngine = Option(
+        ClearEngine.model.value,  # type: ignore[attr-defined]
+        help="Clear notebook models, dictionaries (`raw`) or read them incrementally"
+        " (`stream`, for large notebooks) - `raw` and `stream` skip validation",
+    ),
+    cache: bool = Option(
+        True,
+        help=f"Whether to skip unchanged clean notebooks (cached in `{CACHE_DIR}`)",
+    ),
     verbose: bool = Option(
         False, "--verbose", "-v", help="Log processed files in console"
     ),
@@ -154,7 +215,13 @@ def meta(
     ),
 ) -> None:
     """Clear both notebook and cell metadata."""
-    nb_paths = _check_paths(paths=paths, ignore=ignore)
+    nb_paths = _check_paths(
+        paths=paths,
+        ignore=ignore,
+        gitignore=gitignore,
+        changed_since=changed_since,
+        staged=staged,
+    )
 
     if not bool(prefix + suffix) and not check:
         overwrite = (
@@ -187,12 +254,15 @@ def meta(
             read_paths=nb_paths,
             write_paths=write_paths,
             progress_callback=lambda: progress.update(metadata, advance=1),
+            jobs=jobs or os.cpu_count() or 1,
+            cache_dir=get_cache_dir(nb_paths) if cache else None,
             notebook_metadata_keep=nb_meta_keep,
             cell_metadata_keep=cell_meta_keep,
             cell_fields_keep=cell_fields_keep,
             check=check,
             verbose=verbose,
             overwrite=overwrite,
+            engine=engine,
         )
     if check:
         if all(are_equal):
@@ -214,6 +284,15 @@ def meta(
 def affirm_meta(
     paths: List[Path] = Argument(..., is_eager=True, help="Path(s) of notebook files"),
     ignore: List[str] = Option(["!*"], help="Glob expression(s) of files to ignore"),
+    gitignore: bool = Option(
+        True, help="Whether to skip git-ignored files (when inside a git repo)"
+    ),
+    changed_since: Optional[str] = Option(
+        None, help="Only process notebooks changed since git reference (hash, branch)"
+    ),
+    staged: bool = Option(
+        False, "--staged", help="Only process notebooks with changes staged in git"
+    ),
     expr: List[str] = Option(
         (), "--expr", "-x", help="Expressions to assert on notebooks"
     ),
@@ -254,7 +333,13 @@ def affirm_meta(
      `exec_cells` (notebook cells of `code` type that were executed - have an `execution
      count` value). Recipes can be found on `databooks.recipes.CookBook`.
     """
-    nb_paths = _check_paths(paths=paths, ignore=ignore)
+    nb_paths = _check_paths(
+        paths=paths,
+        ignore=ignore,
+        gitignore=gitignore,
+        changed_since=changed_since,
+        staged=staged,
+    )
     exprs = [r.name for r in recipe] + list(expr)
     if not exprs:
         raise BadParameter("Must specify at least one of `expr` or `recipe`.")
@@ -307,6 +392,10 @@ def fix(
         ],
         help="Cell fields to remove before comparing cells",
     ),
+    diff_algorithm: DiffAlgorithm = Option(
+        DiffAlgorithm.difflib.value,  # type: ignore[attr-defined]
+        help="Algorithm to align notebook cells (`patience` is faster for many cells)",
+    ),
     interactive: bool = Option(
         False,
         "--interactive",
@@ -369,6 +458,7 @@ def fix(
             meta_first=metadata_head,
             cells_first=cells_head,
             cell_fields_ignore=cell_fields_ignore,
+            diff_algorithm=diff_algorithm,
             verbose=verbose,
             progress_callback=lambda: progress.update(conflicts, advance=1),
         )
@@ -381,6 +471,9 @@ def show(
         ..., is_eager=True, help="Path(s) of notebook files with conflicts"
     ),
     ignore: List[str] = Option(["!*"], help="Glob expression(s) of files to ignore"),
+    gitignore: bool = Option(
+        True, help="Whether to skip git-ignored files (when inside a git repo)"
+    ),
     export: Optional[ImgFmt] = Option(
         None,
         "--export",
@@ -415,7 +508,7 @@ def show(
     """Show rich representation of notebook."""
     if export is not None and pager:
         raise BadParameter("Cannot use both pager and export output.")
-    nb_paths = _check_paths(paths=paths, ignore=ignore)
+    nb_paths = _check_paths(paths=paths, ignore=ignore, gitignore=gitignore)
     if len(nb_paths) > 1 and not multiple:
         if not Confirm.ask(f"Show {len(nb_paths)} notebooks?"):
             raise Exit()
@@ -448,6 +541,13 @@ def diff(
     pager: bool = Option(
         False, "--pager", "-p", help="Use pager instead of printing to terminal"
     ),
+    diff_algorithm: DiffAlgorithm = Option(
+        DiffAlgorithm.difflib.value,  # type: ignore[attr-defined]
+        help="Algorithm to align notebook cells (`patience` is faster for many cells)",
+    ),
+    cell_fields_ignore: List[str] = Option(
+        [], help="Cell fields to leave out when comparing cells (i.e.: `id`)"
+    ),
     verbose: bool = Option(
         False, "--verbose", "-v", help="Increase verbosity for debugging"
     ),
@@ -481,7 +581,7 @@ def diff(
     if export is not None and pager:
         raise BadParameter("Cannot use both pager and export output.")
     (ref_base, ref_remote), paths = _parse_paths(ref_base, ref_remote, paths=paths)
-    diffs = get_nb_diffs(
+    diffs = iter_nb_diffs(
         ref_base=ref_base, ref_remote=ref_remote, paths=paths, verbose=verbose
     )
     if not diffs:
@@ -490,4 +590,11 @@ def diff(
     if len(diffs) > 1 and not multiple:
         if not Confirm.ask(f"Show {len(diffs)} notebook diffs?"):
             raise Exit()
-    echo(diffs2rich(diffs=diffs, context=export or pager))
+    echo(
+        diffs2rich(
+            diffs=diffs,
+            context=export or pager,
+            diff_algorithm=diff_algorithm,
+            cell_fields_ignore=cell_fields_ignore,
+        )
+    )
@@ -1,15 +1,115 @@
 """Common set of miscellaneous functions."""
-from itertools import chain
-from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
+import os
+import stat
+from fnmatch import fnmatch
+from pathlib import Path, PurePath
+from typing import Iterable, Iterator, List, Optional, Sequence
 
 from databooks.logging import get_logger
 
 logger = get_logger(__file__)
 
 
+def _is_match(name: str, rel_path: str, patterns: Sequence[str]) -> bool:
+    """Check whether path matches any of the glob `patterns` (like `Path.rglob`)."""
+    return any(
+        fnmatch(name, pattern)
+        if "/" not in pattern
+        else PurePath(rel_path).match(pattern)
+        for pattern in patterns
+    )
+
+
+def _walk(
+    root: str, rel_root: str, *, ignore: Sequence[str], rglob: str
+) -> Iterator[Path]:
+    """Recursively yield files in `root` matching `rglob`, pruning ignored paths."""
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except OSError as err:
+        logger.debug(f"Could not read directory {root} - skipping it ({err}).")
+        return
+    for entry in entries:
+        rel_path = os.path.join(rel_root, entry.name)
+        if _is_match(entry.name, rel_path, ignore):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from _walk(entry.path, rel_path, ignore=ignore, rglob=rglob)
+        elif _is_match(entry.name, rel_path, (rglob,)) and entry.is_file():
+            yield Path(entry.path)
+
+
+def _filter(
+    files: Iterable[Path],
+    root: Path,
+    rel_root: str,
+    *,
+    ignore: Sequence[str],
+    rglob: str,
+) -> Iterator[Path]:
+    """Yield `files` in `root` matching `rglob`, skipping files in ignored paths."""
+    for file in files:
+        if root not in file.parents:
+            continue
+        rel_path = rel_root
+        for part in file.relative_to(root).parts:
+            rel_path = os.path.join(rel_path, part)
+            if _is_match(part, rel_path, ignore):
+                break
+        else:
+            if _is_match(file.name, rel_path, (rglob,)) and file.is_file():
+                yield file
+
+
+def iter_paths(
+    paths: List[Path],
+    *,
+    ignore: Sequence[str] = ("!*",),
+    rglob: str = "*.ipynb",
+    files: Optional[Sequence[Path]] = None,
+) -> Iterator[Path]:
+    """
+    Lazily get paths of existing files from list of directory or file paths.
+
+    Directories are walked with `os.scandir`, so ignored directories are pruned
+     instead of being traversed.
+    :param paths: Paths to consider (can be directories or files)
+    :param ignore: Glob expressions of files to ignore, relative to the common parent
+     of `paths`
+    :param rglob: Glob expression for expanding directory paths
+    :param files: Absolute paths of candidate files to expand directories from instead
+     of walking them (i.e.: files that are not git-ignored)
+    :return: Generator of existing file paths (may contain duplicates)
+    """
+    resolved = [path.resolve() for path in paths]
+    common_path = find_common_parent(paths=resolved)
+    for path, resolved_path in zip(paths, resolved):
+        rel_path = os.path.relpath(resolved_path, common_path)
+        if resolved_path.is_dir():
+            if rel_path != os.curdir and _is_match(
+                resolved_path.name, rel_path, ignore
+            ):
+                continue
+            rel_root = "" if rel_path == os.curdir else rel_path
+            if files is None:
+                yield from _walk(
+                    str(resolved_path), rel_root, ignore=ignore, rglob=rglob
+                )
+            else:
+                yield from _filter(
+                    files, resolved_path, rel_root, ignore=ignore, rglob=rglob
+                )
+        elif path.is_file() and not _is_match(path.name, rel_path, ignore):
+            yield path
+
+
 def expand_paths(
-    paths: List[Path], *, ignore: Sequence[str] = ("!*",), rglob: str = "*.ipynb"
+    paths: List[Path],
+    *,
+    ignore: Sequence[str] = ("!*",),
+    rglob: str = "*.ipynb",
+    files: Optional[Sequence[Path]] = None,
 ) -> Optional[List[Path]]:
     """
     Get paths of existing file from list of directory or file paths.
@@ -18,23 +118,16 @@ def expand_paths(
     :param ignore: Glob expressions of files to ignore
     :param rglob: Glob expression for expanding directory paths and filtering out
      existing file paths (i.e.: to retrieve only notebooks)
+    :param files: Absolute paths of candidate files to expand directories from - if
+     `None`, walk the directories
     :return: List of existing file paths
     """
     if not paths:
         return None
-    filepaths = set(
-        chain.from_iterable(
-            list(path.resolve().rglob(rglob)) if path.is_dir() else [path]
-            for path in paths
-        )
-    )
-    common_path = find_common_parent(paths=paths)
-    ignored = set(chain.from_iterable(common_path.rglob(i) for i in ignore))
-    ignored = {p.resolve() for p in ignored}
-    logger.debug(
-        f"{len(ignored)} files will be ignored from {len(filepaths)} file paths."
+    valid_filepaths = list(
+        dict.fromkeys(iter_paths(paths=paths, ignore=ignore, rglob=rglob, files=files))
     )
-    valid_filepaths = [p for p in filepaths - ignored if p.is_file()]
+    logger.debug(f"Found {len(valid_filepaths)} files in {paths} (ignoring {ignore}).")
 
     if not valid_filepaths:
         logger.debug(
@@ -84,3 +177,28 @@ def find_obj(
         return find_obj(
             obj_name=obj_name, start=start, finish=finish.parent, is_dir=is_dir
         )
+
+
+def write_atomic(path: Path, chunks: Iterable[bytes]) -> None:
+    """
+    Write file to a temporary file that then replaces `path`.
+
+    The file is never left partially written, and keeps the permissions of the file it
+     replaces. Symlinks are followed, so the file they point to is replaced.
+    :param path: Path of file to write
+    :param chunks: Contents to write (i.e.: a generator, to write large files)
+    """
+    if path.is_symlink():
+        path = path.resolve()
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        if path.is_file():
+            os.chmod(tmp_path, stat.S_IMODE(path.stat().st_mode))
+        tmp_path.replace(path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
@@ -8,6 +8,7 @@ from typing import Any, Callable, List, Optional, Sequence
 from git import Repo
 
 from databooks.common import find_common_parent
+from databooks.data_models.alignment import DiffAlgorithm
 from databooks.data_models.notebook import JupyterNotebook
 from databooks.git_utils import ConflictFile, get_conflict_blobs, get_repo
 from databooks.logging import get_logger, set_verbose
@@ -47,6 +48,7 @@ def conflict2nb(
     cells_first: Optional[bool] = None,
     cell_fields_ignore: Sequence[str] = ("id", "execution_count"),
     ignore_none: bool = True,
+    diff_algorithm: DiffAlgorithm = DiffAlgorithm.difflib,  # type: ignore[attr-defined]
     verbose: bool = False,
 ) -> JupyterNotebook:
     """
@@ -59,6 +61,8 @@ def conflict2nb(
      notebook
     :param cell_fields_ignore: Fields to remove before comparing notebooks - i.e.: cell
      IDs or execution counts may not want to be considered
+    :param diff_algorithm: Algorithm to align the cells of the notebooks - see
+     `databooks.data_models.notebook.Cells.diff`
     :param verbose: Log written files and metadata conflicts
     :return: Resolved conflicts as a `databooks.data_models.notebook.JupyterNotebook`
      model
@@ -84,7 +88,9 @@ def conflict2nb(
                     cell_metadata_remove=[], cell_remove_fields=cell_fields_ignore
                 )
 
-    diff_nb = nb_1 - nb_2
+    diff_nb = nb_1.diff(
+        nb_2, algorithm=diff_algorithm, ignore_fields=cell_fields_ignore
+    )
     nb = diff_nb.resolve(
         ignore_none=ignore_none,
         keep_first=meta_first,
@@ -118,5 +124,6 @@ def conflicts2nbs(
     """
     for conflict in conflict_files:
         nb = conflict2nb(conflict, **conflict2nb_kwargs)
-        nb.write(path=conflict.filename, overwrite=True)
+        # Resolved notebooks are built from validated models
+        nb.write(path=conflict.filename, overwrite=True, validate=False)
         progress_callback()
@@ -0,0 +1,134 @@
+"""Sequence alignment engines to compute the differences between notebook cells."""
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from enum import Enum
+from typing import Hashable, List, Sequence, Tuple
+
+Opcode = Tuple[str, int, int, int, int]
+
+DiffAlgorithm = Enum("DiffAlgorithm", {"difflib": "difflib", "patience": "patience"})
+
+# Largest product of region lengths to align with `difflib` when there are no anchors
+_MAX_UNANCHORED_SIZE = 10_000
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Get longest subsequence of `pairs` with increasing second indices."""
+    tails: List[int] = []  # smallest second index ending a subsequence of each length
+    tails_idx: List[int] = []
+    prev: List[int] = []
+    for idx, (_, j) in enumerate(pairs):
+        pos = bisect_left(tails, j)
+        prev.append(tails_idx[pos - 1] if pos > 0 else -1)
+        if pos == len(tails):
+            tails.append(j)
+            tails_idx.append(idx)
+        else:
+            tails[pos] = j
+            tails_idx[pos] = idx
+    longest = []
+    idx = tails_idx[-1] if tails_idx else -1
+    while idx >= 0:
+        longest.append(pairs[idx])
+        idx = prev[idx]
+    return longest[::-1]
+
+
+def _patience_matches(
+    a: Sequence[Hashable], b: Sequence[Hashable]
+) -> List[Tuple[int, int]]:
+    """Get matching indices of `a` and `b`, anchored on elements unique in both."""
+    matches = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            matches.append((alo, blo))
+            alo, blo = alo + 1, blo + 1
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi, bhi = ahi - 1, bhi - 1
+            matches.append((ahi, bhi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        a_counts = Counter(a[alo:ahi])
+        b_counts = Counter(b[blo:bhi])
+        b_unique = {b[j]: j for j in range(blo, bhi) if b_counts[b[j]] == 1}
+        anchors = _longest_increasing(
+            [
+                (i, b_unique[a[i]])
+                for i in range(alo, ahi)
+                if a_counts[a[i]] == 1 and a[i] in b_unique
+            ]
+        )
+        if not anchors:
+            # Without unique elements to anchor on, only align small regions with
+            #  `difflib` (larger ones are left unmatched, as a single replacement)
+            if (ahi - alo) * (bhi - blo) <= _MAX_UNANCHORED_SIZE:
+                matcher = SequenceMatcher(
+                    isjunk=None, a=a[alo:ahi], b=b[blo:bhi], autojunk=False
+                )
+                matches.extend(
+                    (alo + i + k, blo + j + k)
+                    for i, j, size in matcher.get_matching_blocks()
+                    for k in range(size)
+                )
+            continue
+
+        for i, j in anchors:
+            matches.append((i, j))
+            regions.append((alo, i, blo, j))
+            alo, blo = i + 1, j + 1
+        regions.append((alo, ahi, blo, bhi))
+    return sorted(matches)
+
+
+def patience_opcodes(a: Sequence[Hashable], b: Sequence[Hashable]) -> List[Opcode]:
+    """
+    Get opcodes to turn `a` into `b` with patience diff.
+
+    Elements that are unique in both sequences anchor the alignment, which is then
+     recursively computed between anchors. Runs in `O(n log n)` for typical notebooks,
+     instead of the worst case quadratic time of `difflib.SequenceMatcher`.
+    :param a: First sequence
+    :param b: Second sequence
+    :return: Opcodes like `difflib.SequenceMatcher.get_opcodes`
+    """
+    opcodes: List[Opcode] = []
+    i = j = 0
+    for ai, bj in [*_patience_matches(a, b), (len(a), len(b))]:
+        if i < ai or j < bj:
+            tag = "replace" if i < ai and j < bj else "delete" if i < ai else "insert"
+            opcodes.append((tag, i, ai, j, bj))
+        if ai < len(a) or bj < len(b):
+            if opcodes and opcodes[-1][0] == "equal":
+                tag, i1, _, j1, _ = opcodes.pop()
+                opcodes.append((tag, i1, ai + 1, j1, bj + 1))
+            else:
+                opcodes.append(("equal", ai, ai + 1, bj, bj + 1))
+        i, j = ai + 1, bj + 1
+    return opcodes
+
+
+def get_opcodes(
+    a: Sequence[Hashable],
+    b: Sequence[Hashable],
+    algorithm: DiffAlgorithm = DiffAlgorithm.difflib,  # type: ignore[attr-defined]
+) -> List[Opcode]:
+    """
+    Get opcodes to turn `a` into `b`, with all elements (no grouping).
+
+    :param a: First sequence
+    :param b: Second sequence
+    :param algorithm: Alignment algorithm - `difflib` (`difflib.SequenceMatcher`) or
+     `patience` (faster for long sequences)
+    :return: Opcodes like `difflib.SequenceMatcher.get_opcodes`
+    """
+    if algorithm is DiffAlgorithm.patience:  # type: ignore[attr-defined]
+        opcodes = patience_opcodes(a, b)
+    else:
+        matcher = SequenceMatcher(isjunk=None, a=a, b=b, autojunk=False)
+        opcodes = list(matcher.get_opcodes())
+    # Keep one (empty) group of cells when comparing empty sequences
+    return opcodes or [("equal", 0, 0, 0, 0)]
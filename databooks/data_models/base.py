@@ -3,12 +3,29 @@ from __future__ import annotations
 
 from abc import abstractmethod
 from collections import UserList
-from typing import Any, Dict, Generic, Iterable, List, TypeVar, cast, overload
+from functools import lru_cache
+from itertools import chain
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Tuple,
+    Type,
+    TypeVar,
+    cast,
+    overload,
+)
 
 from pydantic import BaseModel, Extra, create_model
 from typing_extensions import Protocol, runtime_checkable
 
+from databooks.json_backend import loads
+from databooks.json_stream import LazyJSON
+
 T = TypeVar("T")
+M = TypeVar("M", bound="DatabooksBase")
 
 
 @runtime_checkable
@@ -29,6 +46,11 @@ class BaseCells(UserList, Generic[T]):
         """Return valid notebook cells from differences."""
         raise NotImplementedError
 
+    @abstractmethod
+    def diff(self, other: Any, **kwargs: Any) -> BaseCells:
+        """Return differences between cells."""
+        raise NotImplementedError
+
 
 @overload
 def resolve(
@@ -86,6 +108,28 @@ def resolve(
     return type(model).mro()[1](**res_vals)
 
 
+# Most recent "diff model" classes to keep (one per model and set of extra fields)
+_DIFF_MODELS_MAX_SIZE = 256
+
+
+@lru_cache(maxsize=_DIFF_MODELS_MAX_SIZE)
+def _diff_model(base: Type[DatabooksBase], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """
+    Get 'diff model' class of `base` with `fields`, cached for the most recent ones.
+
+    Fields hold either the nested 'diff models' or the pairs of values - their values
+     are not validated, so they are typed as `Any`.
+    """
+    fields_d: Dict[str, Any] = {name: (Any, None) for name in fields}
+    return create_model(
+        "Diff" + base.__name__,
+        __base__=base,
+        resolve=resolve,
+        is_diff=True,
+        **fields_d,
+    )
+
+
 class DatabooksBase(BaseModel):
     """Base Pydantic class with extras on managing fields."""
 
@@ -93,6 +137,38 @@ class DatabooksBase(BaseModel):
         """Default configuration for base class."""
 
         extra = Extra.allow
+        json_loads = loads
+        json_encoders = {LazyJSON: lambda value: value.data}
+
+    def __init__(__pydantic_self__, **data: Any) -> None:
+        """Validate model, keeping extra fields in the order they are passed."""
+        super().__init__(**data)
+        if len(__pydantic_self__.__dict__) > len(__pydantic_self__.__fields__):
+            # Pydantic sets extra fields in arbitrary order (from a set of names)
+            __pydantic_self__._sort_fields(data)
+
+    def _sort_fields(self, extra_fields: Iterable[str] = ()) -> None:
+        """Sort fields - declared fields first, then `extra_fields` and the others."""
+        values = self.__dict__
+        fields = {
+            name: values[name]
+            for name in chain(self.__fields__, extra_fields)
+            if name in values
+        }
+        fields.update(values)
+        object.__setattr__(self, "__dict__", fields)
+
+    @classmethod
+    def from_dict(cls: Type[M], values: Dict[str, Any], *, validate: bool = True) -> M:
+        """
+        Build model from a dictionary, optionally skipping validation.
+
+        :param values: Fields and values of the model
+        :param validate: Whether to validate `values` - only skip validation for trusted
+         data, since `pydantic.BaseModel.construct` neither checks nor coerces values
+        :return: Model instance
+        """
+        return cls.parse_obj(values) if validate else cls.construct(**values)
 
     def remove_fields(
         self,
@@ -100,7 +176,7 @@ class DatabooksBase(BaseModel):
         *,
         recursive: bool = False,
         missing_ok: bool = False,
-    ) -> None:
+    ) -> bool:
         """
         Remove selected fields.
 
@@ -108,15 +184,18 @@ class DatabooksBase(BaseModel):
         :param recursive: Whether to remove the fields recursively in case of nested
          models
         :param missing_ok: Whether to raise errors in case field is missing
-        :return:
+        :return: Whether any field was removed
         """
         d_model = dict(self)
+        removed = False
         for field in fields:
             field_val = d_model.get(field) if missing_ok else d_model[field]
             if recursive and isinstance(field_val, DatabooksBase):
-                field_val.remove_fields(fields)
+                removed |= field_val.remove_fields(fields)
             elif field in d_model:
                 delattr(self, field)
+                removed = True
+        return removed
 
     def __str__(self) -> str:
         """Return outputs of __repr__."""
@@ -129,6 +208,18 @@ class DatabooksBase(BaseModel):
         The difference basically return models that replace each fields by a tuple,
          where for each field we have `field = (self_value, other_value)`
         """
+        return self.diff(other)
+
+    def diff(self, other: DatabooksBase, **diff_kwargs: Any) -> DiffModel:
+        """
+        Difference between `databooks.data_models.base.DatabooksBase` objects.
+
+        Same as subtracting the objects, but with options for nested models.
+        :param other: Model to compare to
+        :param diff_kwargs: Keyword arguments passed to the `diff` of nested models and
+         cells (i.e.: `algorithm` of `databooks.data_models.notebook.Cells.diff`)
+        :return: Diff model
+        """
         if type(self) != type(other):
             raise TypeError(
                 f"Unsupported operand types for `-`: `{type(self).__name__}` and"
@@ -139,9 +230,9 @@ class DatabooksBase(BaseModel):
         self_d = dict(self)
         other_d = dict(other)
 
-        # Build dict with {field: (type, value)} for each field
+        # Build dict with {field: value} for each field, in order of appearance
         fields_d: Dict[str, Any] = {}
-        for name in self_d.keys() | other_d.keys():
+        for name in {**self_d, **other_d}:
             self_val = self_d.get(name)
             other_val = other_d.get(name)
             if type(self_val) is type(other_val) and all(
@@ -149,16 +240,10 @@ class DatabooksBase(BaseModel):
                 for val in (self_val, other_val)
             ):
                 # Recursively get the diffs for nested models
-                fields_d[name] = (Any, self_val - other_val)  # type: ignore
+                fields_d[name] = self_val.diff(other_val, **diff_kwargs)  # type: ignore
             else:
-                fields_d[name] = (tuple, (self_val, other_val))
-
-        # Build Pydantic models dynamically
-        DiffInstance = create_model(
-            "Diff" + type(self).__name__,
-            __base__=type(self),
-            resolve=resolve,
-            is_diff=True,
-            **fields_d,
-        )
-        return cast(DiffModel, DiffInstance())  # it'll be filled in with the defaults
+                fields_d[name] = (self_val, other_val)
+
+        # Reuse Pydantic model classes, and skip validation (and copies) of the values
+        DiffInstance = _diff_model(type(self), tuple(fields_d))
+        return cast(DiffModel, DiffInstance.construct(**fields_d, is_diff=True))
@@ -1,9 +1,22 @@
 """Data models - Cells and components."""
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
-
-from pydantic import PositiveInt, validator
+import hashlib
+import json
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from pydantic import PositiveInt, parse_obj_as, validator
 from rich.console import Console, ConsoleOptions, ConsoleRenderable, RenderResult
 from rich.markdown import Markdown
 from rich.panel import Panel
@@ -12,6 +25,7 @@ from rich.text import Text
 
 from databooks.data_models.base import DatabooksBase
 from databooks.data_models.rich_helpers import HtmlTable, RichHtmlTableError
+from databooks.json_stream import LazyDict, LazyJSON, LazyList
 from databooks.logging import get_logger
 
 logger = get_logger(__file__)
@@ -34,20 +48,47 @@ class BaseCell(DatabooksBase):
     cell_type: str
 
     def __hash__(self) -> int:
-        """Cells must be hashable for `difflib.SequenceMatcher`."""
+        """
+        Hash cell type, fields and source - equal cells have equal hashes.
+
+        Cheaper than `databooks.data_models.cell.BaseCell.fingerprint`, whose digests
+         differ for some equal cells (i.e.: `execution_count` of `1` and `1.0`).
+        """
+        values = self.__dict__
+        source = values.get("source")
         return hash(
-            (type(self),) + tuple(v) if isinstance(v, list) else v
-            for v in self.__dict__.values()
+            (
+                values.get("cell_type"),
+                frozenset(values),
+                tuple(source) if isinstance(source, list) else source,
+            )
+        )
+
+    def fingerprint(self, ignore_fields: Iterable[str] = ()) -> str:
+        """
+        Get digest of the cell contents, stable across processes.
+
+        Equal cells have equal fingerprints, including nested metadata and outputs.
+        :param ignore_fields: Cell fields to leave out (i.e.: `id`, `execution_count`)
+        :return: Hexadecimal digest of the cell as canonical JSON
+        """
+        canonical = json.dumps(
+            self.dict(exclude=set(ignore_fields)),
+            sort_keys=True,
+            separators=(",", ":"),
+            default=lambda v: v.data if isinstance(v, LazyJSON) else str(v),
         )
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
 
     def remove_fields(
         self, fields: Iterable[str] = (), missing_ok: bool = True, **kwargs: Any
-    ) -> None:
+    ) -> bool:
         """
         Remove cell fields.
 
         Similar to `databooks.data_models.base.remove_fields`, but will ignore required
-         fields for cell type.
+         fields for cell type. Returns whether the cell changed - removing empty outputs
+         or execution counts from code cells leaves them as they were.
         """
         # Ignore required `BaseCell` fields
         cell_fields = BaseCell.__fields__  # required fields
@@ -59,7 +100,9 @@ class BaseCell(DatabooksBase):
             )
             fields = [f for f in fields if f not in cell_fields]
 
-        super(BaseCell, self).remove_fields(fields, missing_ok=missing_ok)
+        cell_d = dict(self)
+        if not super(BaseCell, self).remove_fields(fields, missing_ok=missing_ok):
+            return False
 
         if self.cell_type == "code":
             self.outputs: CellOutputs = (
@@ -70,6 +113,9 @@ class BaseCell(DatabooksBase):
             self.execution_count: Optional[PositiveInt] = (
                 None if "execution_count" not in dict(self) else self.execution_count
             )
+            # Keep (re-added) outputs with the declared fields, like validated cells
+            self._sort_fields()
+        return dict(self) != cell_d
 
     def clear_fields(
         self,
@@ -77,7 +123,7 @@ class BaseCell(DatabooksBase):
         cell_metadata_keep: Sequence[str] = None,
         cell_metadata_remove: Sequence[str] = None,
         cell_remove_fields: Sequence[str] = (),
-    ) -> None:
+    ) -> bool:
         """
         Clear cell metadata, execution count, outputs or other desired fields (id, ...).
 
@@ -87,7 +133,7 @@ class BaseCell(DatabooksBase):
          sequence (i.e.: `()`) to remove all extra fields.
         :param cell_metadata_remove: Metadata values to remove
         :param cell_remove_fields: Fields to remove from cell
-        :return:
+        :return: Whether any metadata or field was removed from the cell
         """
         nargs = sum((cell_metadata_keep is not None, cell_metadata_remove is not None))
         if nargs != 1:
@@ -100,9 +146,9 @@ class BaseCell(DatabooksBase):
             cell_metadata_remove = tuple(
                 field for field, _ in self.metadata if field not in cell_metadata_keep
             )
-        self.metadata.remove_fields(cell_metadata_remove)  # type: ignore
-
-        self.remove_fields(fields=cell_remove_fields, missing_ok=True)
+        meta_removed = self.metadata.remove_fields(cell_metadata_remove)  # type: ignore
+        fields_removed = self.remove_fields(fields=cell_remove_fields, missing_ok=True)
+        return meta_removed or fields_removed
 
 
 class CellStreamOutput(DatabooksBase):
@@ -234,6 +280,21 @@ CellOutputType = Union[
     CellStreamOutput, CellDisplayDataOutput, CellExecuteResultOutput, CellErrorOutput
 ]
 
+CELL_OUTPUT_TYPES: Dict[str, Type[CellOutputType]] = {
+    "stream": CellStreamOutput,
+    "display_data": CellDisplayDataOutput,
+    "execute_result": CellExecuteResultOutput,
+    "error": CellErrorOutput,
+}
+
+# Output payloads that can be deserialized on first access, and their lazy types -
+#  payloads that are not accessed are not validated (empty values are, instead)
+LAZY_OUTPUT_FIELDS: Dict[str, Tuple[str, Type[LazyJSON]]] = {
+    "stream": ("text", LazyList),
+    "display_data": ("data", LazyDict),
+    "execute_result": ("data", LazyDict),
+}
+
 
 class CellOutputs(DatabooksBase):
     """Outputs of notebook code cells."""
@@ -253,6 +314,39 @@ class CellOutputs(DatabooksBase):
         """Alias `__root__` with outputs for easy referencing."""
         return self.__root__
 
+    @classmethod
+    def from_outputs(
+        cls, outputs: List[Dict[str, Any]], *, validate: bool = True
+    ) -> CellOutputs:
+        """
+        Build outputs choosing the model of each output from its `output_type`.
+
+        Faster than `parse_obj`, that tries each model in `CellOutputType` until one is
+         valid. Outputs of unknown types are parsed (and validated) as usual.
+        :param outputs: Cell outputs
+        :param validate: Whether to validate the outputs
+        :return: Cell outputs model
+        """
+        values: List[CellOutputType] = []
+        for output in outputs:
+            output_type = (
+                output.get("output_type") if isinstance(output, dict) else None
+            )
+            model = CELL_OUTPUT_TYPES.get(output_type)  # type: ignore
+            if model is None:
+                values.append(parse_obj_as(CellOutputType, output))  # type: ignore
+                continue
+            field, _ = LAZY_OUTPUT_FIELDS.get(output_type, (None, None))  # type: ignore
+            lazy_value = output.get(field) if field is not None else None
+            if validate and isinstance(lazy_value, LazyJSON):
+                # Lazy payloads are not validated (see `LAZY_OUTPUT_FIELDS`)
+                value = model.from_dict({**output, field: lazy_value.container()})
+                setattr(value, field, lazy_value)  # type: ignore
+                values.append(value)
+            else:
+                values.append(model.from_dict(output, validate=validate))
+        return cls.construct(__root__=values)
+
 
 class CodeCell(BaseCell):
     """Cell of type `code` - defined for rich displaying in terminal."""
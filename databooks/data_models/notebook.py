@@ -1,35 +1,67 @@
 """Data models - Jupyter Notebooks and components."""
 from __future__ import annotations
 
-import json
-from copy import deepcopy
-from difflib import SequenceMatcher
+import os
+from functools import partial
 from itertools import chain
 from pathlib import Path
 from typing import (
     Any,
     Callable,
+    Dict,
     Generator,
     Iterable,
     List,
     Optional,
     Sequence,
     Tuple,
+    Type,
     TypeVar,
     Union,
     cast,
 )
 
-from pydantic import Extra, validate_model
+from pydantic import (
+    Extra,
+    PrivateAttr,
+    ValidationError,
+    parse_obj_as,
+    validate_model,
+)
+from pydantic.error_wrappers import ErrorWrapper
 from pydantic.generics import GenericModel
+from pydantic.utils import ROOT_KEY
 from rich import box
 from rich.columns import Columns
 from rich.console import Console, ConsoleOptions, Group, RenderableType, RenderResult
 from rich.panel import Panel
 from rich.text import Text
 
+from databooks.common import write_atomic
+from databooks.data_models.alignment import DiffAlgorithm, get_opcodes
 from databooks.data_models.base import BaseCells, DatabooksBase
-from databooks.data_models.cell import CellMetadata, CodeCell, MarkdownCell, RawCell
+from databooks.data_models.cell import (
+    LAZY_OUTPUT_FIELDS,
+    BaseCell,
+    CellMetadata,
+    CellOutputs,
+    CodeCell,
+    MarkdownCell,
+    RawCell,
+)
+from databooks.data_models.view import ModelView, notebook_view
+from databooks.json_backend import loads
+from databooks.json_stream import (
+    Buffer,
+    LazyJSON,
+    dumps,
+    load_span,
+    map_file,
+    parse_array,
+    parse_object,
+    read_buffer,
+    small_value_end,
+)
 from databooks.logging import get_logger
 
 logger = get_logger(__file__)
@@ -38,11 +70,111 @@ Cell = Union[CodeCell, RawCell, MarkdownCell]
 CellsPair = Tuple[List[Cell], List[Cell]]
 T = TypeVar("T", Cell, CellsPair)
 
+# Smaller outputs are deserialized right away - deferring them costs more than it saves
+LAZY_OUTPUT_MIN_SIZE = 4096
+# Smaller files are deserialized at once for read-only views - scanning them is slower
+LAZY_VIEW_MIN_SIZE = 2**24
+
+CELL_TYPES: Dict[str, Type[BaseCell]] = {
+    "code": CodeCell,
+    "markdown": MarkdownCell,
+    "raw": RawCell,
+}
+
+
+def _parse_output(buf: Buffer, pos: int) -> Tuple[Dict[str, Any], int]:
+    """Deserialize cell output, except for the payload of large outputs (lazy value)."""
+    small_end = small_value_end(buf, pos, LAZY_OUTPUT_MIN_SIZE)
+    if small_end is not None:
+        return load_span(buf, (pos, small_end)), small_end
+    members, end = parse_object(buf, pos)
+    output_type = (
+        load_span(buf, members["output_type"]) if "output_type" in members else None
+    )
+    field, lazy_type = (
+        LAZY_OUTPUT_FIELDS.get(output_type, (None, None))
+        if isinstance(output_type, str)
+        else (None, None)
+    )
+    output = {
+        key: lazy_type.from_span(buf, span)
+        if key == field and lazy_type is not None
+        else load_span(buf, span)
+        for key, span in members.items()
+    }
+    return output, end
+
+
+def _parse_cell(buf: Buffer, pos: int) -> Tuple[Dict[str, Any], int]:
+    """Deserialize cell, with the payloads of its large outputs as lazy values."""
+    small_end = small_value_end(buf, pos, LAZY_OUTPUT_MIN_SIZE)
+    if small_end is not None:
+        return load_span(buf, (pos, small_end)), small_end
+    members, end = parse_object(
+        buf, pos, parsers={"outputs": partial(parse_array, parse=_parse_output)}
+    )
+    cell = {
+        key: value if key == "outputs" else load_span(buf, value)
+        for key, value in members.items()
+    }
+    return cell, end
+
+
+def _validation_value(value: Any) -> Any:
+    """Get value to validate - lazy values are only validated if accessed."""
+    if not isinstance(value, LazyJSON):
+        return value
+    return value.data if value.is_loaded else value.container()
+
+
+def _validation_values(nb_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace lazy payloads of outputs in notebook dictionary, to validate it."""
+    cells = [
+        {
+            **cell,
+            "outputs": [
+                {key: _validation_value(value) for key, value in output.items()}
+                if isinstance(output, dict)
+                else output
+                for output in cell["outputs"]
+            ],
+        }
+        if isinstance(cell, dict) and isinstance(cell.get("outputs"), list)
+        else cell
+        for cell in nb_dict["cells"]
+    ]
+    return {**nb_dict, "cells": cells}
+
+
+def _load_lazy_outputs(buf: Buffer) -> Any:
+    """
+    Deserialize notebook, keeping the payloads of large cell outputs as lazy values.
+
+    See `databooks.data_models.cell.LAZY_OUTPUT_FIELDS`. The document is scanned once,
+     and documents that are not JSON objects with arrays of objects for cells and
+     outputs are deserialized as usual.
+    """
+    try:
+        members, end = parse_object(
+            buf, parsers={"cells": partial(parse_array, parse=_parse_cell)}
+        )
+        if buf[end:].strip():
+            raise ValueError(f"Expected end of document at position {end}.")
+        return {
+            key: value if key == "cells" else load_span(buf, value)
+            for key, value in members.items()
+        }
+    except ValueError:
+        logger.debug("Could not read notebook incrementally, deserializing it.")
+        return loads(buf)
+
 
 class Cells(GenericModel, BaseCells[T]):
     """Similar to `list`, with `-` operator using `difflib.SequenceMatcher`."""
 
     __root__: Sequence[T] = ()
+    # Cell fields left out when comparing the pairs of cells of a diff
+    _ignore_fields: Tuple[str, ...] = PrivateAttr(default=())
 
     def __init__(self, elements: Sequence[T] = ()) -> None:
         """Allow passing data as a positional argument when instantiating class."""
@@ -59,35 +191,61 @@ class Cells(GenericModel, BaseCells[T]):
 
     def __sub__(self: Cells[Cell], other: Cells[Cell]) -> Cells[CellsPair]:
         """Return the difference using `difflib.SequenceMatcher`."""
+        return self.diff(other)
+
+    def diff(
+        self: Cells[Cell],
+        other: Cells[Cell],
+        *,
+        algorithm: DiffAlgorithm = DiffAlgorithm.difflib,  # type: ignore[attr-defined]
+        ignore_fields: Sequence[str] = (),
+        **kwargs: Any,
+    ) -> Cells[CellsPair]:
+        """
+        Return the difference between cells, as pairs of differing and equal cells.
+
+        :param other: Cells to compare to
+        :param algorithm: Alignment algorithm - `difflib` (`difflib.SequenceMatcher`,
+         quadratic in the worst case) or `patience` (faster for notebooks with many
+         cells)
+        :param ignore_fields: Cell fields to leave out when comparing cells (i.e.: `id`,
+         `execution_count`) - see `databooks.data_models.cell.BaseCell.fingerprint`
+        :param kwargs: (Unused) keyword arguments to keep compatibility with
+         `databooks.data_models.base.DatabooksBase.diff`
+        :return: Pairs of cells from `self` and `other`
+        """
         if type(self) != type(other):
             raise TypeError(
                 f"Unsupported operand types for `-`: `{type(self).__name__}` and"
                 f" `{type(other).__name__}`"
             )
 
-        # By setting the context to the max number of cells and using
-        #  `pathlib.SequenceMatcher.get_grouped_opcodes` we essentially get the same
-        #  result as `pathlib.SequenceMatcher.get_opcodes` but in smaller chunks
-        n_context = max(len(self), len(other))
-        diff_opcodes = list(
-            SequenceMatcher(
-                isjunk=None, a=self, b=other, autojunk=False
-            ).get_grouped_opcodes(n_context)
+        # Compare fingerprints, computed once per cell, instead of the cell models
+        diff_opcodes = get_opcodes(
+            [cell.fingerprint(ignore_fields) for cell in self],
+            [cell.fingerprint(ignore_fields) for cell in other],
+            algorithm=algorithm,
         )
-
-        if len(diff_opcodes) > 1:
-            raise RuntimeError(
-                "Expected one group for opcodes when context size is "
-                f" {n_context} for {len(self)} and {len(other)} cells in"
-                " notebooks."
-            )
-        return Cells[CellsPair](
+        diff_cells = Cells[CellsPair](
             [
                 # https://github.com/python/mypy/issues/9459
                 tuple((self.data[i1:j1], other.data[i2:j2]))  # type: ignore
-                for _, i1, j1, i2, j2 in chain.from_iterable(diff_opcodes)
+                for _, i1, j1, i2, j2 in diff_opcodes
             ]
         )
+        diff_cells._ignore_fields = tuple(ignore_fields)
+        return diff_cells
+
+    def _is_equal(self, pair: CellsPair) -> bool:
+        """Check whether pair of cells is equal, leaving out the ignored fields."""
+        first_cells, last_cells = pair
+        if not self._ignore_fields:
+            return first_cells == last_cells
+        return len(first_cells) == len(last_cells) and all(
+            first.fingerprint(self._ignore_fields)
+            == last.fingerprint(self._ignore_fields)
+            for first, last in zip(first_cells, last_cells)
+        )
 
     def __rich_console__(
         self, console: Console, options: ConsoleOptions
@@ -100,7 +258,7 @@ class Cells(GenericModel, BaseCells[T]):
         if all(isinstance(el, tuple) for el in self.data):
             return chain.from_iterable(
                 Cells.wrap_cols(val[0], val[1], **wrap_cols_kwargs)
-                if val[0] != val[1]
+                if not self._is_equal(val)
                 else val[0]
                 for val in cast(List[CellsPair], self.data)
             )
@@ -111,6 +269,42 @@ class Cells(GenericModel, BaseCells[T]):
         """Get validators for custom class."""
         yield cls.validate
 
+    @classmethod
+    def from_cells(
+        cls, cells: List[Dict[str, Any]], *, validate: bool = True
+    ) -> Cells[Cell]:
+        """
+        Build cells choosing the model of each cell from its `cell_type`.
+
+        Faster than validating `Cells[Cell]`, that tries each model in `Cell` until one
+         is valid. Cells of unknown types are parsed (and validated) as usual.
+        :param cells: Notebook cells
+        :param validate: Whether to validate the cells
+        :return: Notebook cells model
+        """
+        values: List[BaseCell] = []
+        for cell in cells:
+            model = (
+                CELL_TYPES.get(cell.get("cell_type"))  # type: ignore
+                if isinstance(cell, dict)
+                else None
+            )
+            if model is None:
+                values.append(parse_obj_as(Cell, cell))  # type: ignore
+                continue
+            cell = {
+                **cell,
+                "metadata": CellMetadata.from_dict(
+                    cell.get("metadata", {}), validate=validate
+                ),
+            }
+            if isinstance(cell.get("outputs"), list):
+                cell["outputs"] = CellOutputs.from_outputs(
+                    cell["outputs"], validate=validate
+                )
+            values.append(model.from_dict(cell, validate=validate))
+        return Cells[Cell].construct(__root__=values)
+
     @classmethod
     def validate(cls, v: List[T]) -> Cells[T]:
         """Ensure object is custom defined container."""
@@ -188,7 +382,7 @@ class Cells(GenericModel, BaseCells[T]):
                     hash_first=first_id,
                     hash_last=last_id,
                 )
-                if val[0] != val[1]
+                if not self._is_equal(val)
                 else val[0]
                 for val in self.data
             )
@@ -242,34 +436,161 @@ class JupyterNotebook(DatabooksBase, extra=Extra.forbid):
                 cell.metadata = CellMetadata(**cell.metadata.dict(), lang=nb_lang)
         yield self.cells
 
+    @classmethod
+    def from_dict(
+        cls, values: Dict[str, Any], *, validate: bool = True
+    ) -> JupyterNotebook:
+        """
+        Build notebook choosing the models of cells and outputs from their types.
+
+        :param values: Notebook fields and values
+        :param validate: Whether to validate the notebook - only skip validation for
+         trusted notebooks (i.e.: when only removing fields)
+        :return: Jupyter notebook
+        """
+        if not (
+            isinstance(values, dict)
+            and isinstance(values.get("metadata"), dict)
+            and isinstance(values.get("cells"), list)
+        ):
+            return cls.parse_obj(values)
+        values = {
+            **values,
+            "metadata": NotebookMetadata.from_dict(
+                values["metadata"], validate=validate
+            ),
+            "cells": Cells.from_cells(values["cells"], validate=validate),
+        }
+        return super(JupyterNotebook, cls).from_dict(values, validate=validate)
+
+    @classmethod
+    def load(
+        cls, path: Path | str, *, validate: bool = True, lazy_outputs: bool = False
+    ) -> JupyterNotebook:
+        """
+        Load notebook from a path, without trying each model of the cell unions.
+
+        See `databooks.data_models.notebook.JupyterNotebook.from_dict`. The file is
+         memory-mapped and deserialized from its bytes (see
+         `databooks.json_stream.read_buffer`).
+        :param path: Path of notebook file
+        :param validate: Whether to validate the notebook
+        :param lazy_outputs: Whether to only deserialize the payloads of outputs (`data`
+         and `text`) when accessed - payloads that are not accessed are neither
+         validated nor serialized again when writing the notebook (see
+         `databooks.json_stream.LazyJSON`)
+        :return: Jupyter notebook
+        """
+        if lazy_outputs:
+            # Lazy values keep the map of the file, until they are deserialized
+            return cls.from_dict(
+                _load_lazy_outputs(read_buffer(path)), validate=validate
+            )
+        with map_file(path) as buf:
+            values = loads(buf)
+        return cls.from_dict(values, validate=validate)
+
+    @staticmethod
+    def load_view(path: Path | str) -> ModelView:
+        """
+        Load read-only view of notebook from a path, without validating it.
+
+        Lighter than loading the notebook models, for notebooks that are only read -
+         see `databooks.data_models.view.notebook_view`. For large files, payloads of
+         large outputs are only deserialized when accessed, like with
+         `lazy_outputs=True`.
+        :param path: Path of notebook file
+        :return: Read-only view of the notebook
+        """
+        buf = read_buffer(path)
+        if len(buf) >= LAZY_VIEW_MIN_SIZE:
+            return notebook_view(_load_lazy_outputs(buf))
+        return notebook_view(loads(buf))
+
     @classmethod
     def parse_file(cls, path: Path | str, **parse_kwargs: Any) -> JupyterNotebook:
-        """Parse notebook from a path."""
+        """
+        Parse notebook from a path.
+
+        The file is memory-mapped and deserialized from its bytes, unless other
+         `parse_kwargs` are given (see `pydantic.BaseModel.parse_file`).
+        """
         content_arg = parse_kwargs.pop("content_type", None)
         if content_arg is not None:
             raise ValueError(
                 f"Value of `content_type` must be `json` (default), got `{content_arg}`"
             )
-        return super(JupyterNotebook, cls).parse_file(
-            path=path, content_type="json", **parse_kwargs
-        )
+        if parse_kwargs:
+            return super(JupyterNotebook, cls).parse_file(
+                path=path, content_type="json", **parse_kwargs
+            )
+        with map_file(path) as buf:
+            values = loads(buf)
+        return cls.parse_obj(values)
+
+    @classmethod
+    def parse_raw(cls, b: str | bytes, **parse_kwargs: Any) -> JupyterNotebook:
+        """
+        Parse notebook from a JSON document.
+
+        Documents in `bytes` are deserialized without decoding them to `str` first,
+         unless other `parse_kwargs` are given (see `pydantic.BaseModel.parse_raw`).
+        """
+        if parse_kwargs or isinstance(b, str):
+            return super(JupyterNotebook, cls).parse_raw(b, **parse_kwargs)
+        try:
+            values = loads(b)
+        except ValueError as e:
+            raise ValidationError([ErrorWrapper(e, loc=ROOT_KEY)], cls)
+        return cls.parse_obj(values)
 
     def write(
-        self, path: Path | str, overwrite: bool = False, **json_kwargs: Any
+        self,
+        path: Path | str,
+        overwrite: bool = False,
+        *,
+        validate: bool = True,
+        **json_kwargs: Any,
     ) -> None:
-        """Write notebook to disk."""
+        """
+        Write notebook to disk.
+
+        The notebook is written to a temporary file that then replaces `path`, so the
+         file is never left partially written. If `path` already has the same contents,
+         it is not touched.
+        :param path: Path of notebook file to write
+        :param overwrite: Whether to overwrite the file if it exists
+        :param validate: Whether to validate the notebook before writing - only skip
+         validation for notebooks that were validated when loaded or created (i.e.:
+         after removing fields or resolving conflicts)
+        :param json_kwargs: Keyword arguments to pass to
+         `databooks.json_stream.dumps`
+        """
         path = Path(path) if not isinstance(path, Path) else path
-        json_kwargs = {"indent": 2, **json_kwargs}
         if path.is_file() and not overwrite:
             raise ValueError(
                 f"File exists at {path} exists. Specify `overwrite = True`."
             )
 
-        _, _, validation_error = validate_model(self.__class__, self.dict())
-        if validation_error:
-            raise validation_error
-        with path.open("w") as f:
-            json.dump(self.dict(), fp=f, **json_kwargs)
+        nb_dict = self.dict()
+        if validate:
+            _, _, validation_error = validate_model(
+                self.__class__, _validation_values(nb_dict)
+            )
+            if validation_error:
+                raise validation_error
+        # Same bytes as writing in text mode (with platform line endings)
+        contents = dumps(nb_dict, **json_kwargs).replace("\n", os.linesep).encode()
+        if path.is_symlink():
+            path = path.resolve()
+        if (
+            path.is_file()
+            and path.stat().st_size == len(contents)
+            and path.read_bytes() == contents
+        ):
+            logger.debug(f"Notebook contents at {path} are unchanged.")
+            return
+        write_atomic(path, [contents])
 
     def clear_metadata(
         self,
@@ -277,7 +598,7 @@ class JupyterNotebook(DatabooksBase, extra=Extra.forbid):
         notebook_metadata_keep: Sequence[str] = None,
         notebook_metadata_remove: Sequence[str] = None,
         **cell_kwargs: Any,
-    ) -> None:
+    ) -> bool:
         """
         Clear notebook and cell metadata.
 
@@ -286,7 +607,7 @@ class JupyterNotebook(DatabooksBase, extra=Extra.forbid):
         :param notebook_metadata_remove: Metadata values to remove
         :param cell_kwargs: keyword arguments to be passed to each cell's
          `databooks.data_models.cell.BaseCell.clear_metadata`
-        :return:
+        :return: Whether any metadata or cell field was removed from the notebook
         """
         nargs = sum(
             (notebook_metadata_keep is not None, notebook_metadata_remove is not None)
@@ -302,10 +623,10 @@ class JupyterNotebook(DatabooksBase, extra=Extra.forbid):
                 for field, _ in self.metadata
                 if field not in notebook_metadata_keep
             )
-        self.metadata.remove_fields(notebook_metadata_remove)  # type: ignore
+        removed = self.metadata.remove_fields(notebook_metadata_remove)  # type: ignore
 
         if len(cell_kwargs) > 0:
-            _clean_cells = deepcopy(self.cells)
-            for cell in _clean_cells:
-                cell.clear_fields(**cell_kwargs)
-            self.cells = _clean_cells
+            # Clear cells in place - copying them would duplicate all outputs
+            for cell in self.cells:
+                removed |= cell.clear_fields(**cell_kwargs)
+        return removed
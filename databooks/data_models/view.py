@@ -0,0 +1,179 @@
+"""Data models - Read-only views of notebooks, for workloads that only read them."""
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, ClassVar, Dict, Iterator, Tuple, Type
+
+from pydantic import BaseModel
+
+
+class ModelView(tuple):
+    """
+    Read-only view of a model, with the values of its fields by index.
+
+    Lighter than `databooks.data_models.base.DatabooksBase` models (no instance
+     `__dict__`, set of fields nor validation), for notebooks that are only read (i.e.:
+     `databooks.affirm.affirm`). Like the models, fields are attributes and iterating
+     yields `(field, value)` pairs. Fields that are shadowed by `tuple` attributes
+     (i.e.: `count`) are still returned by `ModelView._get`. Views of models with a
+     custom root (i.e.: cell outputs) have a `__root__` field.
+    """
+
+    __slots__ = ()
+    _fields: ClassVar[Tuple[str, ...]] = ()
+    _index: ClassVar[Dict[str, int]] = {}
+
+    def _get(self, name: str) -> Any:
+        """Get value of field `name`."""
+        try:
+            idx = self._index[name]
+        except KeyError:
+            raise AttributeError(
+                f"`{type(self).__name__}` has no field `{name}`."
+            ) from None
+        return tuple.__getitem__(self, idx)
+
+    def __getattr__(self, name: str) -> Any:
+        """Get value of field `name` (only called if not an attribute of the class)."""
+        return self._get(name)
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:  # type: ignore[override]
+        """Iterate over `(field, value)` pairs, like `pydantic.BaseModel`."""
+        return zip(self._fields, tuple.__iter__(self))
+
+    def __contains__(self, item: Any) -> bool:
+        """Check if `item` is one of the `(field, value)` pairs."""
+        return any(item == pair for pair in self)
+
+    def __eq__(self, other: Any) -> bool:
+        """Compare fields and values, like `pydantic.BaseModel` (also to models)."""
+        return dict(self) == (
+            dict(other) if isinstance(other, (ModelView, BaseModel)) else other
+        )
+
+    def __ne__(self, other: Any) -> bool:
+        """Compare views with different fields or values."""
+        return not self == other
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __getnewargs__(self) -> Tuple[Tuple[Any, ...]]:  # type: ignore[override]
+        """Get values to copy view (not `(field, value)` pairs)."""
+        return (tuple(tuple.__iter__(self)),)
+
+    def __repr__(self) -> str:
+        """Represent view like the models, with its fields and values."""
+        fields = ", ".join(f"{name}={value!r}" for name, value in self)
+        return f"{type(self).__name__}({fields})"
+
+    def dict(self) -> Dict[str, Any]:
+        """Get fields and values, with nested views as dictionaries - like the models."""
+        return {name: _values(value) for name, value in self}
+
+
+def _values(value: Any) -> Any:
+    """Get values of (nested) views, like `pydantic.BaseModel.dict`."""
+    if isinstance(value, ModelView):
+        if value._fields == ("__root__",):
+            return _values(value._get("__root__"))
+        return value.dict()
+    if isinstance(value, (list, tuple)):
+        return [_values(el) for el in value]
+    return value
+
+
+# Most recent view classes to keep (one per name and set of fields, i.e.: metadata)
+_VIEW_TYPES_MAX_SIZE = 1024
+
+
+@lru_cache(maxsize=_VIEW_TYPES_MAX_SIZE)
+def view_type(name: str, fields: Tuple[str, ...]) -> Type[ModelView]:
+    """Get view class `name` with `fields`, cached for the most recent ones."""
+    index = {field: idx for idx, field in enumerate(fields)}
+    return type(
+        name, (ModelView,), {"__slots__": (), "_fields": fields, "_index": index}
+    )
+
+
+def _view(name: str, values: Dict[str, Any]) -> ModelView:
+    """Get view of fields and values."""
+    return view_type(name, tuple(values))(values.values())
+
+
+# Fields of notebooks and of each cell type, as required by their models (and Jupyter)
+_NOTEBOOK_FIELDS = ("nbformat", "nbformat_minor", "metadata", "cells")
+_CELL_FIELDS = {
+    "code": ("metadata", "source", "outputs", "execution_count"),
+    "markdown": ("metadata", "source"),
+    "raw": ("metadata", "source"),
+}
+
+
+def _check_notebook(values: Any) -> None:
+    """Check the structure of the notebook, cells and outputs - not their values."""
+    if not isinstance(values, dict) or set(values) != set(_NOTEBOOK_FIELDS):
+        raise ValueError(f"Expected notebook with fields {list(_NOTEBOOK_FIELDS)}.")
+    if not isinstance(values["metadata"], dict) or not isinstance(
+        values["cells"], list
+    ):
+        raise ValueError(
+            "Expected notebook with `metadata` dictionary and `cells` list."
+        )
+    for idx, cell in enumerate(values["cells"]):
+        cell_type = cell.get("cell_type") if isinstance(cell, dict) else None
+        fields = _CELL_FIELDS.get(cell_type) if isinstance(cell_type, str) else None
+        if fields is None:
+            raise ValueError(
+                f"Expected cell {idx} to be a dictionary with `cell_type` in"
+                f" {list(_CELL_FIELDS)}."
+            )
+        missing = [field for field in fields if field not in cell]
+        if missing:
+            raise ValueError(f"Missing fields {missing} in cell {idx}.")
+        if not isinstance(cell["metadata"], dict) or not isinstance(
+            cell["source"], (list, str)
+        ):
+            raise ValueError(
+                f"Expected cell {idx} with `metadata` dictionary and `source` list or"
+                " string."
+            )
+        if "outputs" in fields and not (
+            isinstance(cell["outputs"], list)
+            and all(isinstance(output, dict) for output in cell["outputs"])
+        ):
+            raise ValueError(
+                f"Expected cell {idx} with `outputs` list of dictionaries."
+            )
+
+
+def _cell_view(cell: Dict[str, Any]) -> ModelView:
+    """Get view of cell, with views of its metadata and outputs."""
+    values = dict(cell)
+    values["metadata"] = _view("CellMetadataView", values["metadata"])
+    if "outputs" in values:
+        outputs = [_view("CellOutputView", output) for output in values["outputs"]]
+        values["outputs"] = _view("CellOutputsView", {"__root__": outputs})
+    return _view("CellView", values)
+
+
+def notebook_view(values: Dict[str, Any]) -> ModelView:
+    """
+    Get read-only view of notebook from its deserialized values, without validation.
+
+    The notebook, its metadata, cells and outputs are views - like their models in
+     `databooks.data_models.notebook.JupyterNotebook`. Other values are left as is
+     (i.e.: `source` lists), and cells are in a tuple. Only the structure of the
+     notebook is checked (its fields and the ones of each cell type, including
+     `execution_count` of code cells), not the values.
+    :param values: Notebook fields and values
+    :return: Read-only view of the notebook
+    """
+    _check_notebook(values)
+    return _view(
+        "JupyterNotebookView",
+        {
+            **values,
+            "metadata": _view("NotebookMetadataView", values["metadata"]),
+            "cells": tuple(_cell_view(cell) for cell in values["cells"]),
+        },
+    )
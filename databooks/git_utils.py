@@ -1,11 +1,29 @@
 """Git helper functions."""
+from __future__ import annotations
+
+import subprocess
 from dataclasses import dataclass
 from enum import Enum
+from itertools import chain
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Union, cast, overload
+from types import TracebackType
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+    overload,
+)
 
 from git import Git
-from git.diff import DiffIndex
+from git.diff import Diff, DiffIndex
+from git.index import IndexFile
 from git.objects.blob import Blob
 from git.objects.commit import Commit
 from git.objects.tree import Tree
@@ -16,6 +34,9 @@ from databooks.logging import get_logger, set_verbose
 
 logger = get_logger(name=__file__)
 
+# Git pathspec wildcards also match directory separators - any notebook in the repo
+NB_PATHSPEC = "*.ipynb"
+
 # https://github.com/python/mypy/issues/5317
 ChangeType = Enum("ChangeType", [*DiffIndex.change_type, "U"])  # type: ignore[misc]
 
@@ -35,8 +56,8 @@ class ConflictFile:
     filename: Path
     first_log: str
     last_log: str
-    first_contents: str
-    last_contents: str
+    first_contents: bytes
+    last_contents: bytes
 
 
 @dataclass
@@ -44,7 +65,7 @@ class Contents:
     """Container for path of file versions."""
 
     path: Optional[Path]
-    contents: Optional[str]
+    contents: Optional[bytes]
 
 
 @dataclass
@@ -62,15 +83,81 @@ def blob2str(blob: None) -> None:
 
 
 @overload
-def blob2str(blob: Blob) -> str:
+def blob2str(blob: Blob) -> bytes:
     ...
 
 
-def blob2str(blob: Optional[Blob]) -> Optional[str]:
+def blob2str(blob: Optional[Blob]) -> Optional[bytes]:
     """Get the blob contents if they exist (otherwise return `None`)."""
     return blob.data_stream.read() if blob is not None else None
 
 
+class BlobReader:
+    """
+    Read blob contents through a single long-lived `git cat-file --batch` process.
+
+    Use as a context manager to make sure the process is terminated.
+    """
+
+    def __init__(self, repo: Repo) -> None:
+        """Initialize reader - `git cat-file` process is only started when reading."""
+        self.repo = repo
+        self._proc: Optional[Any] = None
+
+    def __enter__(self) -> BlobReader:
+        """Return reader in context."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        """Terminate the `git cat-file` process."""
+        self.close()
+
+    @property
+    def proc(self) -> Any:
+        """Get the `git cat-file --batch` process (start it if needed)."""
+        if self._proc is None:
+            self._proc = self.repo.git.cat_file(
+                "--batch", as_process=True, istream=subprocess.PIPE
+            )
+        return self._proc
+
+    @overload
+    def read(self, blob: None) -> None:
+        ...
+
+    @overload
+    def read(self, blob: Blob) -> bytes:
+        ...
+
+    def read(self, blob: Optional[Blob]) -> Optional[bytes]:
+        """Get the blob contents if they exist (otherwise return `None`)."""
+        if blob is None:
+            return None
+        self.proc.stdin.write(blob.hexsha.encode() + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) != 3:
+            raise ValueError(f"Could not read blob {blob.hexsha} - got {header}.")
+        contents = self.proc.stdout.read(int(header[-1]))
+        self.proc.stdout.read(1)  # contents are followed by a newline
+        return contents
+
+    def close(self) -> None:
+        """Close `git cat-file` process and its pipes."""
+        if self._proc is not None:
+            proc, self._proc = self._proc, None
+            proc.stdin.close()
+            proc.wait()
+            for stream in (proc.stdout, proc.stderr):
+                if stream is not None:
+                    stream.close()
+
+
 def blob2commit(blob: Blob, repo: Repo) -> str:
     """Get the short commit message from blob hash."""
     _git = Git(working_dir=repo.working_dir)
@@ -82,12 +169,70 @@ def blob2commit(blob: Blob, repo: Repo) -> str:
     )
 
 
+def blobs2commits(blobs: Sequence[Blob], repo: Repo) -> Dict[str, str]:
+    """
+    Get the short commit messages for multiple blobs, walking the git history once.
+
+    Equivalent to `databooks.git_utils.blob2commit` for each blob, but the history is
+     only walked until all blobs are found. Blobs that are not found in any commit
+     (i.e.: stashes) fall back to `databooks.git_utils.blob2commit`.
+    :param blobs: Blobs to get the commits from
+    :param repo: The git repo with the blobs
+    :return: Mapping of blob hashes to their commits (short commit message)
+    """
+    targets = {blob.hexsha for blob in blobs}
+    found: Dict[str, Tuple[str, str]] = {}  # blob hash: (commit hash, subject)
+    if not targets:
+        return {}
+
+    # Same order as `git log --all --oneline`, but with the blobs changed in each commit
+    log = repo.git.log(
+        "--all", "--raw", "--no-abbrev", "--format=%x00%H %s", as_process=True
+    )
+    try:
+        commit_id, subject = "", ""
+        for raw_line in log.stdout:
+            line = raw_line.decode(errors="replace").rstrip("\n")
+            if line.startswith("\0"):
+                commit_id, _, subject = line[1:].partition(" ")
+            elif line.startswith(":"):
+                # Raw diff lines: `:<src mode> <dst mode> <src blob> <dst blob> ...`
+                _, _, src, dst, _ = line.split(maxsplit=4)
+                if src == dst:
+                    continue
+                for blob_id in {src, dst} & targets - found.keys():
+                    found[blob_id] = (commit_id, subject)
+                if len(found) == len(targets):
+                    break
+    finally:
+        log.proc.kill()
+        log.proc.wait()
+        log.stdout.close()
+
+    # Full hashes are needed for blobs - abbreviate commit hashes like `--oneline`
+    commit_ids = sorted({commit_id for commit_id, _ in found.values()})
+    short_ids: Dict[str, str] = {}
+    if commit_ids:
+        short_log = repo.git.log("--no-walk=unsorted", "--format=%h", *commit_ids)
+        short_ids = dict(zip(commit_ids, short_log.split()))
+    commits = {
+        blob_id: f"{short_ids[commit_id]} {subject}"
+        for blob_id, (commit_id, subject) in found.items()
+    }
+    for blob in blobs:
+        if blob.hexsha not in commits:
+            logger.debug(f"Blob {blob.hexsha} not found in history.")
+            commits[blob.hexsha] = blob2commit(blob=blob, repo=repo)
+    return commits
+
+
 def diff2contents(
     blob: Blob,
     ref: Optional[Union[Tree, Commit, str]],
     path: Path,
     not_exists: bool = False,
-) -> Optional[str]:
+    reader: Optional[BlobReader] = None,
+) -> Optional[bytes]:
     """
     Get the blob contents from the diff.
 
@@ -99,14 +244,16 @@ def diff2contents(
     :param path: path to object
     :param not_exists: whether object exists at 'diff time' (added or removed objects
      do not exist)
-    :return: blob contents as a string (if exists)
+    :param reader: `databooks.git_utils.BlobReader` to read the blob contents with -
+     if `None`, read blob with `databooks.git_utils.blob2str`
+    :return: blob contents as bytes (if exists)
     """
     if not_exists:
         return None
     elif ref is None:
-        return path.read_text()
+        return path.read_bytes()
     else:
-        return blob2str(blob)
+        return reader.read(blob) if reader is not None else blob2str(blob)
 
 
 def get_repo(path: Path) -> Optional[Repo]:
@@ -122,45 +269,195 @@ def get_repo(path: Path) -> Optional[Repo]:
         logger.debug(f"No repo found at {path}.")
 
 
+def _nested_repo_dir(path: Path, root: Path) -> Optional[Path]:
+    """Get the directory of the nested repo (or submodule) in `root` with `path`."""
+    for parent in (path, *path.parents):
+        if parent == root or root not in parent.parents:
+            return None
+        if (parent / ".git").exists():
+            return parent
+    return None
+
+
+def get_repo_files(repo: Repo, paths: Sequence[Path] = ()) -> List[Path]:
+    """
+    Get tracked and untracked files in repo that are not git-ignored.
+
+    Files of submodules and of other (untracked) repos nested in `repo` are listed from
+     those repos - `git ls-files` only lists their directories.
+    :param repo: The git repo
+    :param paths: Paths (files or directories) to list files from - defaults to the
+     whole repo
+    :return: Absolute paths of files
+    """
+    if repo.working_dir is None:
+        raise ValueError("Cannot list files of a bare repo.")
+    root = Path(repo.working_dir)
+    pathspecs: List[Path] = []
+    nested_paths: Dict[Path, List[Path]] = {}
+    for path in paths:
+        nested_dir = _nested_repo_dir(path.resolve(), root.resolve())
+        if nested_dir is None:
+            pathspecs.append(path.resolve())
+        else:
+            nested_paths.setdefault(nested_dir, []).append(path)
+
+    files: List[Path] = []
+    if pathspecs or not paths:
+        args = ("-z", "--", *(str(path) for path in pathspecs))
+        # Entries are `<mode> <object> <stage>\t<file>` - submodules have mode 160000
+        staged = [
+            entry.split("\t", 1)
+            for entry in repo.git.ls_files("--stage", *args).split("\0")
+            if entry
+        ]
+        others = repo.git.ls_files("--others", "--exclude-standard", *args)
+        for is_repo, name in chain(
+            ((info.startswith("160000 "), name) for info, name in staged),
+            ((name.endswith("/"), name) for name in others.split("\0") if name),
+        ):
+            path = root / name
+            if not is_repo:
+                files.append(path)
+            elif (path / ".git").exists():
+                nested_paths.setdefault(path, [])
+    for nested_dir, nested_dir_paths in nested_paths.items():
+        files.extend(get_repo_files(Repo(nested_dir), paths=nested_dir_paths))
+    return list(dict.fromkeys(files))
+
+
+def get_changed_files(
+    repo: Repo,
+    ref: Optional[str] = None,
+    *,
+    staged: bool = False,
+    paths: Sequence[Path] = (),
+) -> List[Path]:
+    """
+    Get files changed relative to a git reference.
+
+    :param repo: The git repo
+    :param ref: Reference (hash, branch, etc.) to compare to - defaults to `HEAD`
+    :param staged: Compare the index instead of the working tree (excluding untracked
+     files)
+    :param paths: Paths (files or directories) to get changes from - defaults to the
+     whole repo
+    :return: Absolute paths of files that were added, copied, modified or renamed
+    """
+    if repo.working_dir is None:
+        raise ValueError("Cannot get changed files of a bare repo.")
+    pathspecs = [str(path.resolve()) for path in paths]
+    changed = repo.git.diff(
+        *(("--cached",) if staged else ()),
+        ref or "HEAD",
+        "--name-only",
+        "--diff-filter=d",
+        "-z",
+        "--",
+        *pathspecs,
+    ).split("\0")
+    if not staged:
+        changed += repo.git.ls_files(
+            "--others", "--exclude-standard", "-z", "--", *pathspecs
+        ).split("\0")
+    root = Path(repo.working_dir)
+    return list(dict.fromkeys(root / f for f in changed if f))
+
+
 def get_conflict_blobs(repo: Repo) -> List[ConflictFile]:
     """Get the source files for conflicts."""
     unmerged_blobs = repo.index.unmerged_blobs()
-    blobs = (
+    blobs = [
         UnmergedBlob(filename=Path(k), stage=dict(v))
         for k, v in unmerged_blobs.items()
         if 0 not in dict(v).keys()  # only get blobs that could not be merged
-    )
+    ]
 
     if not isinstance(repo.working_dir, (Path, str)):
         raise RuntimeError(
             "Expected `repo` to be `pathlib.Path` or `str`, got"
             f" {type(repo.working_dir)}."
         )
-    return [
-        ConflictFile(
-            filename=repo.working_dir / blob.filename,
-            first_log=blob2commit(blob=blob.stage[2], repo=repo),
-            last_log=blob2commit(blob=blob.stage[3], repo=repo),
-            first_contents=blob2str(blob.stage[2]),
-            last_contents=blob2str(blob.stage[3]),
-        )
-        for blob in blobs
-    ]
+    commits = blobs2commits(
+        blobs=[blob.stage[i] for blob in blobs for i in (2, 3)], repo=repo
+    )
+    with BlobReader(repo) as reader:
+        return [
+            ConflictFile(
+                filename=repo.working_dir / blob.filename,
+                first_log=commits[blob.stage[2].hexsha],
+                last_log=commits[blob.stage[3].hexsha],
+                first_contents=reader.read(blob.stage[2]),
+                last_contents=reader.read(blob.stage[3]),
+            )
+            for blob in blobs
+        ]
 
 
-def get_nb_diffs(
+@dataclass
+class NbDiffs:
+    """
+    Lazy notebook diffs, from `databooks.git_utils.iter_nb_diffs`.
+
+    The number of diffs is known upfront, but the file contents are only read when
+     iterating - only one `databooks.git_utils.DiffContents` is held at a time.
+    """
+
+    repo: Repo
+    ref_base: Union[IndexFile, Tree]
+    ref_remote: Optional[Tree]
+    diffs: List[Diff]
+
+    def __len__(self) -> int:
+        """Get number of notebook diffs."""
+        return len(self.diffs)
+
+    def __iter__(self) -> Iterator[DiffContents]:
+        """Read the contents of each diff."""
+        repo_root_dir = Path(cast(str, self.repo.working_dir))
+        with BlobReader(self.repo) as reader:
+            for d in self.diffs:
+                change_type = ChangeType[d.change_type]
+                yield DiffContents(
+                    a=Contents(
+                        path=Path(d.a_path),
+                        contents=diff2contents(
+                            blob=cast(Blob, d.a_blob),
+                            ref=self.ref_base,
+                            path=repo_root_dir / d.a_path,
+                            not_exists=change_type is ChangeType.A,  # type: ignore
+                            reader=reader,
+                        ),
+                    ),
+                    b=Contents(
+                        path=Path(d.b_path),
+                        contents=diff2contents(
+                            blob=cast(Blob, d.b_blob),
+                            ref=self.ref_remote,
+                            path=repo_root_dir / d.b_path,
+                            not_exists=change_type is ChangeType.D,  # type: ignore
+                            reader=reader,
+                        ),
+                    ),
+                    change_type=change_type,
+                )
+
+
+def iter_nb_diffs(
     ref_base: Optional[str] = None,
     ref_remote: Optional[str] = None,
     paths: Sequence[Path] = (),
     *,
     repo: Optional[Repo] = None,
     verbose: bool = False,
-) -> List[DiffContents]:
+) -> NbDiffs:
     """
-    Get the noteebook(s) git diff(s).
+    Get the notebook(s) git diff(s), reading the file contents only when iterating.
 
     By default, diffs are compared with the current working directory. That is, staged
-     files will still show up in the diffs. Only return the diffs for notebook files.
+     files will still show up in the diffs. Only return the diffs for notebook files -
+     if no `paths` are given, notebooks are filtered by git (`NB_PATHSPEC`), without
+     walking the working tree.
     """
     if verbose:
         set_verbose(logger)
@@ -170,37 +467,41 @@ def get_nb_diffs(
     if repo is None or repo.working_dir is None:
         raise ValueError("No repo found - cannot compute diffs.")
 
-    ref_base = repo.index if ref_base is None else repo.tree(ref_base)
-    ref_remote = ref_remote if ref_remote is None else repo.tree(ref_remote)
+    base = repo.index if ref_base is None else repo.tree(ref_base)
+    remote = ref_remote if ref_remote is None else repo.tree(ref_remote)
 
     logger.debug(
         f"Looking for diffs on path(s) {[p.resolve() for p in paths]}.\n"
-        f"Comparing `{ref_base}` and `{ref_remote}`."
+        f"Comparing `{base}` and `{remote}`."
     )
-    repo_root_dir = Path(repo.working_dir)
-    return [
-        DiffContents(
-            a=Contents(
-                path=Path(d.a_path),
-                contents=diff2contents(
-                    blob=cast(Blob, d.a_blob),
-                    ref=ref_base,
-                    path=repo_root_dir / d.a_path,
-                    not_exists=d.change_type is ChangeType.A,  # type: ignore
-                ),
-            ),
-            b=Contents(
-                path=Path(d.b_path),
-                contents=diff2contents(
-                    blob=cast(Blob, d.b_blob),
-                    ref=ref_remote,
-                    path=repo_root_dir / d.b_path,
-                    not_exists=d.change_type is ChangeType.D,  # type: ignore
-                ),
-            ),
-            change_type=ChangeType[d.change_type],
-        )
-        for d in ref_base.diff(
-            other=ref_remote, paths=list(paths) or list(repo_root_dir.rglob("*.ipynb"))
+    return NbDiffs(
+        repo=repo,
+        ref_base=base,
+        ref_remote=remote,
+        diffs=list(base.diff(other=remote, paths=list(paths) or NB_PATHSPEC)),
+    )
+
+
+def get_nb_diffs(
+    ref_base: Optional[str] = None,
+    ref_remote: Optional[str] = None,
+    paths: Sequence[Path] = (),
+    *,
+    repo: Optional[Repo] = None,
+    verbose: bool = False,
+) -> List[DiffContents]:
+    """
+    Get the noteebook(s) git diff(s).
+
+    Same as `databooks.git_utils.iter_nb_diffs`, but with the contents of all diffs
+     read into memory.
+    """
+    return list(
+        iter_nb_diffs(
+            ref_base=ref_base,
+            ref_remote=ref_remote,
+            paths=paths,
+            repo=repo,
+            verbose=verbose,
         )
-    ]
+    )
@@ -0,0 +1,124 @@
+"""JSON (de)serialization of notebooks, using `orjson` when it is installed."""
+import json
+import math
+import mmap
+import re
+from typing import Any, Callable, Match, Optional, Union
+
+from databooks.logging import get_logger
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+JSON_BACKEND = "json" if orjson is None else "orjson"
+
+# `json.dumps` escapes all non-ASCII characters by default (`ensure_ascii=True`)
+_NON_ASCII = re.compile(r"[^\x00-\x7e]")
+_DIGITS = frozenset("0123456789")
+
+logger = get_logger(__file__)
+
+
+def _escape_non_ascii(match: Match[str]) -> str:
+    """Escape character like `json.dumps` (surrogate pairs for non-BMP characters)."""
+    code = ord(match.group())
+    if code < 0x10000:
+        return f"\\u{code:04x}"
+    code -= 0x10000
+    return f"\\u{0xD800 | (code >> 10):04x}\\u{0xDC00 | (code & 0x3FF):04x}"
+
+
+def _ensure_ascii(serialized: str) -> str:
+    """Escape non-ASCII characters of JSON document, like `json.dumps`."""
+    if serialized.isascii() and "\x7f" not in serialized:
+        return serialized
+    return _NON_ASCII.sub(_escape_non_ascii, serialized)
+
+
+def _format_floats(serialized: str) -> str:
+    """Format floats like `json.dumps` (i.e.: `1e+16` instead of `1e16`)."""
+    # With indentation, numbers are the last token of a line - strings end with `"`
+    lines = serialized.split("\n")
+    changed = False
+    for i, line in enumerate(lines):
+        end = line[-2:-1] if line[-1:] == "," else line[-1:]
+        if end not in _DIGITS:
+            continue
+        prefix, sep, number = line.rpartition(" ")
+        comma = "," if number.endswith(",") else ""
+        number = number.rstrip(",")
+        if "." in number or "e" in number:
+            lines[i] = f"{prefix}{sep}{float(number)!r}{comma}"
+            changed = True
+    return "\n".join(lines) if changed else serialized
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Whether object has non-finite floats (`NaN` or `Infinity`), in any container."""
+    values = [obj]
+    while values:
+        value = values.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            values.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            values.extend(value)
+    return False
+
+
+def loads(data: Union[str, bytes, memoryview, mmap.mmap]) -> Any:
+    """
+    Deserialize JSON document.
+
+    Documents that `orjson` rejects (i.e.: with `NaN` or integers beyond 64 bits) are
+     deserialized by `json` instead. Buffers (`memoryview` and `mmap.mmap`) are read
+     by `orjson` without copying them.
+    :param data: JSON document
+    :return: Deserialized object
+    """
+    if orjson is not None:
+        try:
+            if isinstance(data, mmap.mmap):
+                with memoryview(data) as view:
+                    return orjson.loads(view)
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            logger.debug("Could not deserialize with `orjson`, falling back to `json`.")
+    return json.loads(
+        bytes(data) if isinstance(data, (memoryview, mmap.mmap)) else data
+    )
+
+
+def dumps(
+    obj: Any, *, default: Optional[Callable[[Any], Any]] = None, **json_kwargs: Any
+) -> str:
+    """
+    Serialize object to JSON, with the same output as `json.dumps` (`indent=2`).
+
+    Only the default formatting (`indent=2` and no other keyword arguments) is
+     serialized with `orjson`. Its output is then escaped and formatted to match
+     `json.dumps` byte by byte. Non-finite floats (`NaN` and `Infinity`) are written as
+     `null` by `orjson`, so objects with them are serialized by `json` instead.
+    :param obj: Object to serialize
+    :param default: Function that returns serializable version of other objects
+    :param json_kwargs: Keyword arguments to pass to `json.dumps`
+    :return: JSON document
+    """
+    json_kwargs = {"indent": 2, **json_kwargs}
+    if orjson is not None and json_kwargs == {"indent": 2}:
+        try:
+            serialized = orjson.dumps(
+                obj, default=default, option=orjson.OPT_INDENT_2
+            ).decode()
+        except TypeError:
+            logger.debug("Could not serialize with `orjson`, falling back to `json`.")
+        else:
+            # Only look for non-finite floats if they could have been written as `null`
+            if "null" not in serialized or not _has_non_finite(obj):
+                return _format_floats(_ensure_ascii(serialized))
+            logger.debug("Non-finite floats in object, falling back to `json`.")
+    return json.dumps(obj, default=default, **json_kwargs)
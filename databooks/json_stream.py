@@ -0,0 +1,474 @@
+"""Incremental reading of JSON documents, without deserializing all their values."""
+import mmap
+import os
+import re
+import sys
+from collections import UserDict, UserList
+from contextlib import contextmanager
+from copy import copy, deepcopy
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Match,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from uuid import uuid4
+
+from databooks.json_backend import _ensure_ascii
+from databooks.json_backend import dumps as _dumps
+from databooks.json_backend import loads
+
+Buffer = Union[bytes, mmap.mmap]
+Span = Tuple[int, int]
+Parser = Callable[[Buffer, int], Tuple[Any, int]]
+L = TypeVar("L", bound="LazyJSON")
+
+MAP_FILES = sys.platform != "win32"
+
+_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+# Strings, and scalars and short strings up to the next bracket or long string
+if sys.version_info >= (3, 11):
+    # Possessive quantifiers do not keep states to backtrack - much faster
+    _STRING = re.compile(rb'"[^"\\]*+(?:\\.[^"\\]*+)*+"', re.DOTALL)
+    _FLAT = re.compile(
+        rb'(?:[^"\[\]{}]++|"[^"\\]{0,256}+(?:\\.[^"\\]{0,256}+){0,8}+")*+',
+        re.DOTALL,
+    )
+else:  # pragma: no cover
+    _STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+    _FLAT = re.compile(
+        rb'(?:[^"\[\]{}]+|"[^"\\]{0,256}(?:\\.[^"\\]{0,256}){0,8}")*', re.DOTALL
+    )
+_SCALAR = re.compile(rb"[^ \t\n\r,\]}]+")
+_INDENT = re.compile(rb" *")
+# Larger values are deserialized from a view of the buffer, instead of a copy
+_COPY_MAX_SIZE = 65536
+
+
+def _error(buf: Buffer, pos: int, expected: str) -> ValueError:
+    """Build error for invalid JSON document."""
+    return ValueError(
+        f"Expected {expected} at position {pos}, got {buf[pos:pos + 1]!r}."
+    )
+
+
+def _skip_whitespace(buf: Buffer, pos: int) -> int:
+    """Get position of the next non-whitespace character."""
+    return _WHITESPACE.match(buf, pos).end()  # type: ignore[union-attr]
+
+
+def _string_end(buf: Buffer, pos: int) -> int:
+    """Get the end position of the JSON string that starts at `pos`."""
+    # Look for the closing quote with `find`, much faster than regular expressions
+    end = buf.find(b'"', pos + 1)
+    if end > 0 and buf[end - 1 : end] != b"\\":
+        return end + 1
+    match = _STRING.match(buf, pos)
+    if match is None:
+        raise _error(buf, pos, "string")
+    return match.end()
+
+
+def value_end(buf: Buffer, pos: int) -> int:
+    """
+    Get the end position of the JSON value that starts at `pos`.
+
+    Strings are skipped without being decoded, and skipped values are not validated.
+    :param buf: JSON document
+    :param pos: Start position of the value
+    :return: Position after the end of the value
+    """
+    char = buf[pos : pos + 1]
+    if char == b'"':
+        return _string_end(buf, pos)
+    if char not in (b"{", b"["):
+        match = _SCALAR.match(buf, pos)
+        if match is None:
+            raise _error(buf, pos, "value")
+        return match.end()
+
+    depth = 0
+    while True:
+        pos = _FLAT.match(buf, pos).end()  # type: ignore[union-attr]
+        token = buf[pos : pos + 1]
+        if token == b'"':
+            pos = _string_end(buf, pos)
+            continue
+        if token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth -= 1
+        else:
+            raise _error(buf, pos, "end of object or array")
+        pos += 1
+        if depth == 0:
+            return pos
+
+
+def small_value_end(buf: Buffer, pos: int, size: int) -> Optional[int]:
+    """
+    Get the end position of the JSON value that starts at `pos`, if it is small.
+
+    Only the first `size` bytes of the value are scanned - small values can then be
+     deserialized at once, and large ones are not scanned entirely twice.
+    :param buf: JSON document
+    :param pos: Start position of the value
+    :param size: Maximum size of the value (exclusive)
+    :return: Position after the end of the value, or `None` if it is not smaller than
+     `size` (or if it is not valid JSON)
+    """
+    window = buf[pos : pos + size]
+    try:
+        end = value_end(window, 0)
+    except ValueError:
+        return None
+    return pos + end if end < size else None
+
+
+def _span(buf: Buffer, pos: int) -> Tuple[Span, int]:
+    """Get span of value that starts at `pos`, without deserializing it."""
+    end = value_end(buf, pos)
+    return (pos, end), end
+
+
+def _iter_values(
+    buf: Buffer,
+    pos: int,
+    *,
+    is_object: bool,
+    parse: Parser = _span,
+    parsers: Optional[Mapping[str, Parser]] = None,
+) -> Generator[Tuple[Any, Any], None, int]:
+    """
+    Iterate members of object or elements of array that starts at `pos`.
+
+    Yield the keys (`None` for arrays) and the values parsed with `parse` (or with
+     `parsers` of their keys), that also returns where the values end. Return the end
+     of the object or array.
+    """
+    opening, closing = (b"{", b"}") if is_object else (b"[", b"]")
+    pos = _skip_whitespace(buf, pos)
+    if buf[pos : pos + 1] != opening:
+        raise _error(buf, pos, opening.decode())
+    pos = _skip_whitespace(buf, pos + 1)
+    if buf[pos : pos + 1] == closing:
+        return pos + 1
+    while True:
+        key = None
+        if is_object:
+            key_end = value_end(buf, pos)
+            key = loads(buf[pos:key_end])
+            pos = _skip_whitespace(buf, key_end)
+            if buf[pos : pos + 1] != b":":
+                raise _error(buf, pos, ":")
+            pos = _skip_whitespace(buf, pos + 1)
+        if parsers and key is not None:
+            value, end = parsers.get(key, parse)(buf, pos)
+        else:
+            value, end = parse(buf, pos)
+        yield key, value
+        pos = _skip_whitespace(buf, end)
+        char = buf[pos : pos + 1]
+        if char == closing:
+            return pos + 1
+        if char != b",":
+            raise _error(buf, pos, f"`,` or {closing.decode()}")
+        pos = _skip_whitespace(buf, pos + 1)
+
+
+def parse_object(
+    buf: Buffer, pos: int = 0, parsers: Optional[Mapping[str, Parser]] = None
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Get the members of the JSON object that starts at `pos`, scanning it once.
+
+    :param buf: JSON document
+    :param pos: Start position of the object (or of whitespace before it)
+    :param parsers: Functions to parse the values of some keys, that return the value
+     and where it ends (i.e.: `parse_array`) - other values are not deserialized
+    :return: Dictionary with the keys and the spans (or parsed values) of the
+     members, and the end of the object
+    """
+    members: Dict[str, Any] = {}
+    values = _iter_values(buf, pos, is_object=True, parsers=parsers)
+    while True:
+        try:
+            key, value = next(values)
+        except StopIteration as stop:
+            return members, stop.value
+        members[key] = value
+
+
+def parse_array(
+    buf: Buffer, pos: int = 0, parse: Parser = _span
+) -> Tuple[List[Any], int]:
+    """
+    Get the elements of the JSON array that starts at `pos`, scanning it once.
+
+    :param buf: JSON document
+    :param pos: Start position of the array (or of whitespace before it)
+    :param parse: Function to parse the elements, that returns the element and where
+     it ends (i.e.: `parse_object`) - by default, elements are not deserialized
+    :return: List with the spans (or parsed values) of the elements, and the end of
+     the array
+    """
+    elements: List[Any] = []
+    values = _iter_values(buf, pos, is_object=False, parse=parse)
+    while True:
+        try:
+            _, value = next(values)
+        except StopIteration as stop:
+            return elements, stop.value
+        elements.append(value)
+
+
+def iter_members(buf: Buffer, pos: int = 0) -> Iterator[Tuple[str, Span]]:
+    """
+    Iterate the members of the JSON object that starts at `pos`.
+
+    :param buf: JSON document
+    :param pos: Start position of the object (or of whitespace before it)
+    :return: Generator of keys and spans of their (not deserialized) values
+    """
+    yield from _iter_values(buf, pos, is_object=True)
+
+
+def iter_elements(buf: Buffer, pos: int = 0) -> Iterator[Span]:
+    """
+    Iterate the elements of the JSON array that starts at `pos`.
+
+    :param buf: JSON document
+    :param pos: Start position of the array (or of whitespace before it)
+    :return: Generator of spans of the (not deserialized) elements
+    """
+    for _, span in _iter_values(buf, pos, is_object=False):
+        yield span
+
+
+def iter_objects(buf: Buffer, pos: int = 0) -> Iterator[Dict[str, Span]]:
+    """
+    Iterate the members of the JSON objects in the array that starts at `pos`.
+
+    Same as `iter_members` for each of `iter_elements`, but each object is only
+     scanned once (i.e.: to get the members of each notebook cell).
+    :param buf: JSON document
+    :param pos: Start position of the array (or of whitespace before it)
+    :return: Generator of dictionaries with the keys and spans of each object
+    """
+    for _, members in _iter_values(buf, pos, is_object=False, parse=parse_object):
+        yield members
+
+
+def is_object(buf: Buffer, span: Span) -> bool:
+    """Check whether value in `span` is a JSON object."""
+    return buf[span[0] : span[0] + 1] == b"{"
+
+
+def is_empty(buf: Buffer, span: Span) -> bool:
+    """Check whether value in `span` is an empty JSON object or array."""
+    start, end = span
+    return buf[start : start + 1] in (b"{", b"[") and (
+        _skip_whitespace(buf, start + 1) == end - 1
+    )
+
+
+def load_span(buf: Buffer, span: Span) -> Any:
+    """Deserialize value in `span`."""
+    start, end = span
+    if end - start < _COPY_MAX_SIZE:
+        return loads(buf[start:end])
+    with memoryview(buf)[start:end] as view:
+        return loads(view)
+
+
+class LazyJSON:
+    """
+    JSON object or array that is only deserialized when accessed.
+
+    Keeps the span of the value in its document, so values that are never accessed
+     are neither deserialized nor serialized again - they are written verbatim by
+     `databooks.json_stream.dumps`. Subclasses are containers of the value (`data`).
+    """
+
+    opening: bytes
+    container: type
+
+    def __init__(self, buf: Buffer, span: Span) -> None:
+        """Hold span of value in `buf` - neither read nor validated until accessed."""
+        self._buf: Optional[Buffer] = buf
+        self._span = span
+        self._value: Any = None
+
+    @classmethod
+    def from_span(cls, buf: Buffer, span: Span) -> Any:
+        """Get lazy value for `span`, or its deserialized value if of another type."""
+        if buf[span[0] : span[0] + 1] == cls.opening:
+            return cls(buf, span)
+        return load_span(buf, span)
+
+    @property  # type: ignore[misc]
+    def data(self) -> Any:
+        """Deserialized value - deserialized on first access."""
+        if self._buf is not None:
+            self._value = load_span(self._buf, self._span)
+            self._buf = None
+        return self._value
+
+    @data.setter
+    def data(self, value: Any) -> None:
+        """Replace value (no longer written verbatim)."""
+        self._value = value
+        self._buf = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether value was deserialized (and may have been modified)."""
+        return self._buf is None
+
+    def raw(self, indent: int) -> Optional[str]:
+        """
+        Get the original JSON of the value, formatted as `databooks.json_backend.dumps`.
+
+        Lines are indented with 2 spaces per level and non-ASCII characters are
+         escaped, but the value is not deserialized.
+        :param indent: Indentation of the line where the value is written
+        :return: JSON of the value, or `None` if it was deserialized or if it was not
+         indented in its document
+        """
+        if self._buf is None:
+            return None
+        start, end = self._span
+        raw = self._buf[start:end].replace(b"\r\n", b"\n")
+        if b"\n" not in raw:
+            return raw.decode() if raw in (b"{}", b"[]") else None
+
+        line_start = self._buf.rfind(b"\n", 0, start) + 1
+        base = _INDENT.match(self._buf, line_start).end() - line_start  # type: ignore
+        lines = raw.split(b"\n")
+        step = len(lines[1]) - len(lines[1].lstrip(b" ")) - base
+        if step <= 0:
+            return None
+        if (base, step) != (indent, 2):
+            for i, line in enumerate(lines[1:], start=1):
+                content = line.lstrip(b" ")
+                level, misaligned = divmod(len(line) - len(content) - base, step)
+                if misaligned or level < 0:
+                    return None
+                lines[i] = b" " * (indent + 2 * level) + content
+        return _ensure_ascii(b"\n".join(lines).decode())
+
+    def __copy__(self: L) -> L:
+        """Copy container, sharing the document of values that were not accessed."""
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._value = copy(self._value)
+        return new
+
+    def __deepcopy__(self: L, memo: Dict[int, Any]) -> L:
+        """Copy container and value, sharing the (read-only) document."""
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new._value = deepcopy(self._value, memo)
+        return new
+
+    def copy(self: L) -> L:
+        """Shallow copy of container."""
+        return self.__copy__()
+
+
+class LazyDict(LazyJSON, UserDict):
+    """JSON object deserialized on first access - see `LazyJSON`."""
+
+    opening = b"{"
+    container = dict
+
+
+class LazyList(LazyJSON, UserList):
+    """JSON array deserialized on first access - see `LazyJSON`."""
+
+    opening = b"["
+    container = list
+
+
+def dumps(obj: Any, **json_kwargs: Any) -> str:
+    """
+    Serialize object with `databooks.json_backend.dumps`, supporting lazy values.
+
+    Lazy values that were not accessed are written from their original JSON (see
+     `databooks.json_stream.LazyJSON.raw`), other ones are serialized.
+    :param obj: Object to serialize
+    :param json_kwargs: Keyword arguments to pass to `databooks.json_backend.dumps`
+    :return: JSON document
+    """
+    verbatim = {"indent": 2, **json_kwargs} == {"indent": 2}
+    placeholder = f"databooks-lazy-{uuid4().hex}-"
+    lazy_values: List[LazyJSON] = []
+
+    def _default(value: Any) -> Any:
+        """Replace lazy values by placeholders, or by their values."""
+        if not isinstance(value, LazyJSON):
+            raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+        if not verbatim or value.is_loaded:
+            return value.data
+        lazy_values.append(value)
+        return f"{placeholder}{len(lazy_values) - 1}"
+
+    def _replace(match: Match[str]) -> str:
+        """Write JSON of lazy value in place of its placeholder."""
+        indent, prefix, index = match.groups()
+        value = lazy_values[int(index)]
+        raw = value.raw(indent=len(indent))
+        if raw is None:
+            # Indent serialized value (but not its first line) at placeholder depth
+            raw = _dumps(value.data).replace("\n", "\n" + indent)
+        return indent + prefix + raw
+
+    serialized = _dumps(obj, default=_default, **json_kwargs)
+    if not lazy_values:
+        return serialized
+    return re.sub(
+        rf'^( *)(.*)"{placeholder}(\d+)"', _replace, serialized, flags=re.MULTILINE
+    )
+
+
+def read_buffer(path: Union[Path, str]) -> Buffer:
+    """
+    Memory-map file for reading, so its contents are only paged in when accessed.
+
+    The map is released once it is no longer referenced (i.e.: by
+     `databooks.json_stream.LazyJSON` values), and files are replaced (not modified in
+     place) when written by databooks. Files cannot be replaced on Windows while they
+     are mapped, so they are read instead.
+    :param path: Path of file to read
+    :return: Read-only buffer (`bytes` for empty files, that cannot be mapped)
+    """
+    with open(path, "rb") as f:
+        if MAP_FILES and os.fstat(f.fileno()).st_size > 0:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+@contextmanager
+def map_file(path: Union[Path, str]) -> Iterator[Buffer]:
+    """
+    Memory-map file for reading, and close the map on exit.
+
+    See `databooks.json_stream.read_buffer`.
+    :param path: Path of file to read
+    :return: Context manager with the read-only buffer
+    """
+    buf = read_buffer(path)
+    try:
+        yield buf
+    finally:
+        if isinstance(buf, mmap.mmap):
+            buf.close()
@@ -1,13 +1,103 @@
 """Metadata wrapper functions for cleaning notebook metadata."""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from enum import Enum
 from pathlib import Path
-from typing import Any, Callable, List, Optional, Sequence
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, cast
 
 from databooks import JupyterNotebook
+from databooks.cache import NotebookCache
+from databooks.common import write_atomic
 from databooks.data_models.cell import BaseCell
+from databooks.data_models.notebook import CELL_TYPES, Cells
+from databooks.json_backend import dumps, loads
+from databooks.json_stream import (
+    Buffer,
+    Span,
+    is_empty,
+    is_object,
+    iter_members,
+    iter_objects,
+    load_span,
+    map_file,
+)
 from databooks.logging import get_logger, set_verbose
 
 logger = get_logger(__file__)
 
+ClearEngine = Enum("ClearEngine", {"model": "model", "raw": "raw", "stream": "stream"})
+
+
+def _is_clearable(notebook: Any) -> bool:
+    """Check whether notebook can be cleared as a dictionary (known cell types)."""
+    return (
+        isinstance(notebook, dict)
+        and isinstance(notebook.get("metadata"), dict)
+        and isinstance(notebook.get("cells"), list)
+        and all(
+            isinstance(cell, dict)
+            and cell.get("cell_type") in CELL_TYPES
+            and isinstance(cell.get("metadata", {}), dict)
+            for cell in notebook["cells"]
+        )
+    )
+
+
+def _clear_cell(
+    cell: Dict[str, Any], cell_metadata_keep: Sequence[str], remove_fields: List[str]
+) -> bool:
+    """Clear cell dictionary like `databooks.data_models.cell.BaseCell.clear_fields`."""
+    metadata = cell.get("metadata", {})
+    metadata_remove = [field for field in metadata if field not in cell_metadata_keep]
+    for field in metadata_remove:
+        del metadata[field]
+
+    fields = [field for field in remove_fields if field in cell]
+    if not fields:
+        return bool(metadata_remove)
+    cell_d = dict(cell)
+    for field in fields:
+        del cell[field]
+    if cell["cell_type"] == "code":
+        # Code cells must have outputs and execution counts, even if empty
+        cell.setdefault("outputs", [])
+        cell.setdefault("execution_count", None)
+    return bool(metadata_remove) or cell != cell_d
+
+
+def clear_dict(
+    notebook: Dict[str, Any],
+    *,
+    notebook_metadata_keep: Sequence[str] = (),
+    cell_metadata_keep: Sequence[str] = (),
+    cell_fields_keep: Sequence[str] = (),
+) -> bool:
+    """
+    Clear metadata of a notebook dictionary in place, without building its models.
+
+    Remove the same fields as `databooks.metadata.clear` - see
+     `databooks.data_models.notebook.JupyterNotebook.clear_metadata`.
+    :param notebook: Deserialized notebook (i.e.: with `databooks.json_backend.loads`)
+    :param notebook_metadata_keep: Notebook metadata fields to keep
+    :param cell_metadata_keep: Cell metadata fields to keep
+    :param cell_fields_keep: Cell fields to keep
+    :return: Whether any metadata or cell field was removed from the notebook
+    """
+    metadata = notebook["metadata"]
+    metadata_remove = [f for f in metadata if f not in notebook_metadata_keep]
+    for field in metadata_remove:
+        del metadata[field]
+
+    # Get fields to remove from cells and keep notebook schema
+    cell_fields = {field for cell in notebook["cells"] for field in cell if field}
+    cell_fields_keep = list(cell_fields_keep) + list(BaseCell.__fields__)
+    cell_remove_fields = [f for f in cell_fields if f not in cell_fields_keep]
+
+    removed = bool(metadata_remove)
+    for cell in notebook["cells"]:
+        removed |= _clear_cell(cell, cell_metadata_keep, cell_remove_fields)
+    return removed
+
 
 def clear(
     read_path: Path,
@@ -18,6 +108,7 @@ def clear(
     check: bool = False,
     verbose: bool = False,
     overwrite: bool = False,
+    engine: ClearEngine = ClearEngine.model,  # type: ignore[attr-defined]
     **kwargs: Any,
 ) -> bool:
     """
@@ -33,8 +124,12 @@ def clear(
     :param check: Don't write any files, check whether there is unwanted metadata
     :param verbose: Log written files
     :param overwrite: Whether to overwrite files (if exists)
+    :param engine: Whether to clear the notebook `model`, its dictionary (`raw`) or to
+     read it incrementally (`stream`, for large notebooks) - `raw` and `stream` are
+     faster, but notebooks are not validated (only their cell types are checked)
     :param kwargs: Additional keyword arguments to pass to
-     `databooks.data_models.JupyterNotebook.clear_metadata`
+     `databooks.data_models.JupyterNotebook.clear_metadata` - the notebook `model` is
+     cleared if any are passed, regardless of `engine`
     :return: Whether notebooks are equal
     """
     if verbose:
@@ -42,7 +137,43 @@ def clear(
 
     if write_path is None:
         write_path = read_path
-    notebook = JupyterNotebook.parse_file(read_path)
+    if kwargs and engine is not ClearEngine.model:  # type: ignore[attr-defined]
+        logger.debug(
+            f"Cannot clear {read_path} with `{engine.value}` engine and arguments"
+            f" {sorted(kwargs)} - using its model."
+        )
+        engine = ClearEngine.model  # type: ignore[attr-defined]
+    if engine is ClearEngine.raw:  # type: ignore[attr-defined]
+        with map_file(read_path) as buf:
+            nb_dict = loads(buf)
+        if _is_clearable(nb_dict):
+            return _clear_raw(
+                nb_dict,
+                read_path=read_path,
+                write_path=write_path,
+                notebook_metadata_keep=notebook_metadata_keep,
+                cell_metadata_keep=cell_metadata_keep,
+                cell_fields_keep=cell_fields_keep,
+                check=check,
+                overwrite=overwrite,
+            )
+        logger.debug(f"Cannot clear {read_path} as a dictionary - using its model.")
+    if engine is ClearEngine.stream:  # type: ignore[attr-defined]
+        nb_equals = _clear_stream(
+            read_path=read_path,
+            write_path=write_path,
+            notebook_metadata_keep=notebook_metadata_keep,
+            cell_metadata_keep=cell_metadata_keep,
+            cell_fields_keep=cell_fields_keep,
+            check=check,
+            overwrite=overwrite,
+        )
+        if nb_equals is not None:
+            return nb_equals
+        logger.debug(f"Cannot clear {read_path} incrementally - using its model.")
+
+    # Removing fields keeps notebooks valid - validate them only when loading
+    notebook = JupyterNotebook.load(read_path)
 
     # Get fields to remove from cells and keep notebook schema
     cell_fields = {field for cell in notebook.cells for field, _ in cell if field}
@@ -52,33 +183,234 @@ def clear(
         field for field in cell_fields if field not in cell_fields_keep
     ]
 
-    notebook.clear_metadata(
+    # Track removed fields instead of parsing the notebook again to compare
+    nb_equals = not notebook.clear_metadata(
         notebook_metadata_keep=notebook_metadata_keep,
         cell_metadata_keep=cell_metadata_keep,
         cell_remove_fields=cell_remove_fields,
         **kwargs,
     )
-    nb_equals = notebook == JupyterNotebook.parse_file(read_path)
 
     if nb_equals or check:
-        msg = (
-            "no metadata to remove."
-            if nb_equals
-            else "only check (unwanted metadata found)."
-        )
-        logger.debug(f"No action taken for {read_path} - {msg}")
+        _log_no_action(read_path, nb_equals=nb_equals)
     else:
-        notebook.write(path=write_path, overwrite=overwrite)
+        notebook.write(path=write_path, overwrite=overwrite, validate=False)
         logger.debug(f"Removed metadata from {read_path}, saved as {write_path}")
 
     return nb_equals
 
 
+def _log_no_action(read_path: Path, *, nb_equals: bool) -> None:
+    """Log that notebook was not written."""
+    msg = (
+        "no metadata to remove."
+        if nb_equals
+        else "only check (unwanted metadata found)."
+    )
+    logger.debug(f"No action taken for {read_path} - {msg}")
+
+
+def _clear_raw(
+    nb_dict: Dict[str, Any],
+    *,
+    read_path: Path,
+    write_path: Path,
+    check: bool,
+    overwrite: bool,
+    **clear_kwargs: Any,
+) -> bool:
+    """Clear notebook dictionary, and only build its model to write it."""
+    nb_equals = not clear_dict(nb_dict, **clear_kwargs)
+    if nb_equals or check:
+        _log_no_action(read_path, nb_equals=nb_equals)
+    else:
+        # Same contents as writing the model-cleared notebook (fields in model order)
+        notebook = JupyterNotebook.from_dict(nb_dict, validate=False)
+        notebook.write(path=write_path, overwrite=overwrite, validate=False)
+        logger.debug(f"Removed metadata from {read_path}, saved as {write_path}")
+    return nb_equals
+
+
+def _index_notebook(
+    buf: Buffer,
+) -> Optional[Tuple[Dict[str, Span], List[Dict[str, Span]], List[str]]]:
+    """Get spans of notebook and cell values, and cell types (if all are known)."""
+    try:
+        nb_spans = dict(iter_members(buf))
+        cells = list(iter_objects(buf, nb_spans["cells"][0]))
+        cell_types = [load_span(buf, cell["cell_type"]) for cell in cells]
+        is_clearable = is_object(buf, nb_spans["metadata"]) and all(
+            isinstance(cell_type, str)
+            and cell_type in CELL_TYPES
+            and ("metadata" not in cell or is_object(buf, cell["metadata"]))
+            for cell, cell_type in zip(cells, cell_types)
+        )
+    except (KeyError, ValueError):
+        return None
+    return (nb_spans, cells, cell_types) if is_clearable else None
+
+
+def _is_reset(buf: Buffer, span: Span, field: str) -> bool:
+    """Check whether code cell field has the value it gets when removed."""
+    start, end = span
+    if field == "outputs":
+        return buf[start : start + 1] == b"[" and is_empty(buf, span)
+    return field == "execution_count" and buf[start:end] == b"null"
+
+
+def _iter_contents(
+    read_path: Path,
+    nb_spans: Dict[str, Span],
+    nb_metadata: Dict[str, Any],
+    cells: List[Dict[str, Span]],
+    cells_metadata: List[Dict[str, Any]],
+    cell_remove_fields: List[str],
+) -> Iterator[str]:
+    """Serialize cleared notebook like its model, deserializing one cell at a time."""
+    with map_file(read_path) as buf:
+        header = {
+            key: nb_metadata
+            if key == "metadata"
+            else []
+            if key == "cells"
+            else load_span(buf, span)
+            for key, span in nb_spans.items()
+        }
+        nb_dict = JupyterNotebook.from_dict(header, validate=False).dict()
+        prefix, _, suffix = dumps(nb_dict).partition('\n  "cells": []')
+        yield prefix + '\n  "cells": ['
+        for i, (cell, metadata) in enumerate(zip(cells, cells_metadata)):
+            values = {
+                key: load_span(buf, span)
+                for key, span in cell.items()
+                if key not in cell_remove_fields
+            }
+            values["metadata"] = metadata
+            if values["cell_type"] == "code" and len(values) < len(cell):
+                # Code cells must have outputs and execution counts, even if empty
+                values.setdefault("outputs", [])
+                values.setdefault("execution_count", None)
+            # Build cell model to get the same fields order as the model engine
+            cell_dict = Cells.from_cells([values], validate=False).data[0].dict()
+            yield ("," if i else "") + "\n    " + dumps(cell_dict).replace(
+                "\n", "\n    "
+            )
+        yield ("\n  ]" if cells else "]") + suffix
+
+
+def _clear_stream(
+    read_path: Path,
+    write_path: Path,
+    *,
+    notebook_metadata_keep: Sequence[str],
+    cell_metadata_keep: Sequence[str],
+    cell_fields_keep: Sequence[str],
+    check: bool,
+    overwrite: bool,
+) -> Optional[bool]:
+    """
+    Clear notebook reading it incrementally, from the memory-mapped file.
+
+    Fields to remove (i.e.: outputs) are never deserialized, and cells are written one
+     at a time. Return `None` if the notebook cannot be cleared incrementally.
+    """
+    with map_file(read_path) as buf:
+        index = _index_notebook(buf)
+        if index is None:
+            return None
+        nb_spans, cells, cell_types = index
+
+        nb_metadata = load_span(buf, nb_spans["metadata"])
+        metadata_remove = [f for f in nb_metadata if f not in notebook_metadata_keep]
+        for field in metadata_remove:
+            del nb_metadata[field]
+
+        # Get fields to remove from cells and keep notebook schema
+        cell_fields = {field for cell in cells for field in cell if field}
+        cell_fields_keep = list(cell_fields_keep) + list(BaseCell.__fields__)
+        cell_remove_fields = [f for f in cell_fields if f not in cell_fields_keep]
+
+        removed = bool(metadata_remove)
+        cells_metadata = []
+        for cell, cell_type in zip(cells, cell_types):
+            metadata = load_span(buf, cell["metadata"]) if "metadata" in cell else {}
+            metadata_remove = [f for f in metadata if f not in cell_metadata_keep]
+            for field in metadata_remove:
+                del metadata[field]
+            cells_metadata.append(metadata)
+
+            # Removing empty outputs or execution counts keeps code cells the same
+            fields = [field for field in cell_remove_fields if field in cell]
+            removed |= bool(metadata_remove) or (
+                bool(fields)
+                and not (
+                    cell_type == "code"
+                    and {"outputs", "execution_count"} <= cell.keys()
+                    and all(_is_reset(buf, cell[field], field) for field in fields)
+                )
+            )
+            if removed and check:
+                break
+
+    nb_equals = not removed
+    if nb_equals or check:
+        _log_no_action(read_path, nb_equals=nb_equals)
+        return nb_equals
+
+    if write_path.is_file() and not overwrite:
+        raise ValueError(
+            f"File exists at {write_path} exists. Specify `overwrite = True`."
+        )
+    contents = _iter_contents(
+        read_path, nb_spans, nb_metadata, cells, cells_metadata, cell_remove_fields
+    )
+    write_atomic(
+        write_path, (chunk.replace("\n", os.linesep).encode() for chunk in contents)
+    )
+    logger.debug(f"Removed metadata from {read_path}, saved as {write_path}")
+    return nb_equals
+
+
+def _clear_paths(
+    read_paths: List[Path],
+    write_paths: List[Path],
+    *,
+    progress_callback: Callable[[], None],
+    jobs: int,
+    **clear_kwargs: Any,
+) -> List[bool]:
+    """Run `databooks.metadata.clear` on paths, in parallel if `jobs` is not `1`."""
+    jobs = min(jobs, len(read_paths))
+    if jobs <= 1:
+        checks = []
+        for nb_path, write_path in zip(read_paths, write_paths):
+            checks.append(
+                clear(read_path=nb_path, write_path=write_path, **clear_kwargs)
+            )
+            progress_callback()
+        return checks
+
+    logger.debug(f"Clearing {len(read_paths)} notebooks with {jobs} processes.")
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                clear, read_path=nb_path, write_path=write_path, **clear_kwargs
+            )
+            for nb_path, write_path in zip(read_paths, write_paths)
+        ]
+        # Report progress as notebooks finish, but return results in input order
+        for _ in as_completed(futures):
+            progress_callback()
+        return [future.result() for future in futures]
+
+
 def clear_all(
     read_paths: List[Path],
     write_paths: List[Path],
     *,
     progress_callback: Callable[[], None] = lambda: None,
+    jobs: int = 1,
+    cache_dir: Optional[Path] = None,
     **clear_kwargs: Any,
 ) -> List[bool]:
     """
@@ -87,16 +419,61 @@ def clear_all(
     :param read_paths: Paths of notebook to remove metadata
     :param write_paths: Paths of where to write cleaned notebooks
     :param progress_callback: Callback function to report progress
+    :param jobs: Number of processes to clear notebooks in parallel - defaults to `1`
+     (clear the notebooks sequentially in the current process)
+    :param cache_dir: Directory of the cache with notebooks that have no unwanted
+     metadata - notebooks whose contents and options match an entry are skipped. If
+     `None`, don't use a cache
     :param clear_kwargs: Keyword arguments to be passed to `databooks.metadata.clear`
-    :return: Whether the notebooks contained or not unwanted metadata
+    :return: Whether the notebooks contained or not unwanted metadata (in the same
+     order as `read_paths`)
     """
     if len(read_paths) != len(write_paths):
         raise ValueError(
             "Read and write paths must have same length."
             f" Got {len(read_paths)} and {len(write_paths)}"
         )
-    checks = []
-    for nb_path, write_path in zip(read_paths, write_paths):
-        checks.append(clear(read_path=nb_path, write_path=write_path, **clear_kwargs))
+    if jobs < 1:
+        raise ValueError(f"Expected `jobs` to be a positive integer, got {jobs}.")
+    if cache_dir is None:
+        return _clear_paths(
+            read_paths,
+            write_paths,
+            progress_callback=progress_callback,
+            jobs=jobs,
+            **clear_kwargs,
+        )
+
+    cache = NotebookCache(cache_dir=cache_dir, name="meta")
+    # Only the options that affect the cleaned notebook should invalidate the cache
+    options = {
+        k: v
+        for k, v in clear_kwargs.items()
+        if k not in ("check", "verbose", "overwrite", "engine")
+    }
+    keys = [cache.key(path, **options) for path in read_paths]
+    checks: List[Optional[bool]] = [True if key in cache else None for key in keys]
+    to_clear = [i for i, is_clean in enumerate(checks) if is_clean is None]
+    logger.debug(
+        f"Skipping {len(read_paths) - len(to_clear)} cached notebooks without"
+        " unwanted metadata."
+    )
+    for _ in range(len(read_paths) - len(to_clear)):
         progress_callback()
-    return checks
+
+    cleared = _clear_paths(
+        [read_paths[i] for i in to_clear],
+        [write_paths[i] for i in to_clear],
+        progress_callback=progress_callback,
+        jobs=jobs,
+        **clear_kwargs,
+    )
+    for i, nb_equals in zip(to_clear, cleared):
+        checks[i] = nb_equals
+        if nb_equals:
+            cache.add(keys[i])
+        elif not clear_kwargs.get("check", False):
+            # Cleaned notebooks were written, so we know their contents are clean
+            cache.add(cache.key(write_paths[i], **options))
+    cache.save()
+    return cast(List[bool], checks)
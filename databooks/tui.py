@@ -3,13 +3,14 @@ from contextlib import AbstractContextManager, nullcontext
 from dataclasses import asdict
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, overload
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union, overload
 
 from rich.columns import Columns
 from rich.console import Console
 from rich.rule import Rule
 from rich.theme import Theme
 
+from databooks.data_models.alignment import DiffAlgorithm
 from databooks.data_models.notebook import JupyterNotebook, NotebookMetadata
 from databooks.git_utils import DiffContents
 
@@ -84,6 +85,8 @@ def diff2rich(
     diff: DiffContents,
     *,
     console: Console = Console(),
+    diff_algorithm: DiffAlgorithm = DiffAlgorithm.difflib,  # type: ignore[attr-defined]
+    cell_fields_ignore: Sequence[str] = (),
 ) -> None:
     """Show rich representation of notebook diff in terminal."""
     a_nb, b_nb = (
@@ -105,12 +108,15 @@ def diff2rich(
         width=console.width // 2,
         padding=(0, 0),
     )
-    console.print(cols, a_nb - b_nb)
+    console.print(
+        cols,
+        a_nb.diff(b_nb, algorithm=diff_algorithm, ignore_fields=cell_fields_ignore),
+    )
 
 
 @overload
 def diffs2rich(
-    diffs: List[DiffContents],
+    diffs: Iterable[DiffContents],
     *,
     context: ImgFmt,
     **kwargs: Any,
@@ -120,7 +126,7 @@ def diffs2rich(
 
 @overload
 def diffs2rich(
-    diffs: List[DiffContents],
+    diffs: Iterable[DiffContents],
     *,
     context: bool,
     **kwargs: Any,
@@ -129,18 +135,26 @@ def diffs2rich(
 
 
 def diffs2rich(
-    diffs: List[DiffContents],
+    diffs: Iterable[DiffContents],
     *,
     context: Union[ImgFmt, bool] = False,
     export_kwargs: Optional[Dict[str, Any]] = None,
+    diff_algorithm: DiffAlgorithm = DiffAlgorithm.difflib,  # type: ignore[attr-defined]
+    cell_fields_ignore: Sequence[str] = (),
     **console_kwargs: Any,
 ) -> Optional[str]:
     """
     Show rich representation of notebook diff in terminal.
 
-    :param diffs: `databooks.git_utils.DiffContents` for rendering
+    :param diffs: `databooks.git_utils.DiffContents` for rendering - rendered one at a
+     time, so lazy iterables (i.e.: `databooks.git_utils.iter_nb_diffs`) are only read
+     as needed
     :param context: specify context - `ImgFmt` to export outputs, `True` for `pager`
     :param export_kwargs: keyword arguments for exporting prints (as a dictionary)
+    :param diff_algorithm: algorithm to align the notebook cells - see
+     `databooks.data_models.notebook.Cells.diff`
+    :param cell_fields_ignore: cell fields to leave out when aligning cells (i.e.:
+     `id`, `execution_count`)
     :param console_kwargs: keyword arguments to be passed to `Console`
     :return: console output if `context` is `ImgFmt`, else `None`
     """
@@ -152,6 +166,11 @@ def diffs2rich(
     }
     with ctx_map.get(context, console.capture()):
         for diff in diffs:
-            diff2rich(diff, console=console)
+            diff2rich(
+                diff,
+                console=console,
+                diff_algorithm=diff_algorithm,
+                cell_fields_ignore=cell_fields_ignore,
+            )
     if isinstance(context, ImgFmt):
         return getattr(console, f"export_{context.name}")(**(export_kwargs or {}))
@@ -1,11 +1,24 @@
+import ast
+import json
 import logging
 from importlib import resources
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 from _pytest.logging import LogCaptureFixture
 
-from databooks.affirm import DatabooksParser, affirm
+from databooks.affirm import (
+    DatabooksParser,
+    affirm,
+    affirm_all,
+    compile_exprs,
+    safe_eval_code,
+)
 from databooks.data_models.base import DatabooksBase
+from databooks.data_models.notebook import JupyterNotebook
+from databooks.data_models.view import notebook_view
+from databooks.json_stream import LazyDict
 
 
 class TestSafeEval:
@@ -136,6 +149,59 @@ class TestSafeEval:
         parser = DatabooksParser(l=[DatabooksBase(a=1, b=2)] * 2)
         assert parser.safe_eval("[e.a for e in l]") == [1, 1]
 
+    def test_comp_invalid_attr(self) -> None:
+        """Attributes other than Pydantic fields in comprehensions are invalid."""
+        parser = DatabooksParser(l=[DatabooksBase(a=1, b=2)] * 2)
+        with pytest.raises(ValueError):
+            parser.safe_eval("[e.__class__ for e in l]")
+
+    def test_read_only(self) -> None:
+        """Objects in scope cannot be modified by expressions."""
+        model = DatabooksBase(a=[1], b={"c": 2}, d=LazyDict(b'{"e": 3}', (0, 8)))
+        parser = DatabooksParser(model=model, l=[model])
+        assert parser.safe_eval("model.b.get('c')") == 2
+        assert parser.safe_eval("l[0].a.count(1)") == 1
+        assert parser.safe_eval("model.d.get('e')") == 3
+        for expr in (
+            "model.a.append(2)",
+            "l[0].b.clear()",
+            "model.d.clear()",
+            "getattr(l[0].a, 'pop')()",
+            "l.pop()",
+        ):
+            with pytest.raises(ValueError):
+                parser.safe_eval(expr)
+        assert parser.safe_eval("hasattr(model.a, 'append')") is False
+        assert model == DatabooksBase(a=[1], b={"c": 2}, d={"e": 3})
+        assert parser.names["l"][0] is model  # not copied
+
+    def test_view_attrs(self) -> None:
+        """Only fields of read-only views are valid attributes."""
+        nb = notebook_view(
+            {
+                "nbformat": 4,
+                "nbformat_minor": 5,
+                "metadata": {"count": 2},
+                "cells": [{"cell_type": "raw", "source": ["x"], "metadata": {}}],
+            }
+        )
+        parser = DatabooksParser(nb=nb)
+        assert parser.safe_eval("nb.metadata.count") == 2
+        assert parser.safe_eval("[c.source for c in nb.cells]") == [["x"]]
+        assert parser.safe_eval("getattr(nb.cells[0], 'outputs', None)") is None
+        for expr in ("nb._fields", "nb.__class__", "nb.cells[0].index", "nb.x"):
+            with pytest.raises(ValueError):
+                parser.safe_eval(expr)
+
+    def test_compile(self) -> None:
+        """Compile expressions once and evaluate them with different variables."""
+        parser = DatabooksParser(m=None)
+        code = parser.safe_compile("m.a * 2")
+        assert safe_eval_code(code, m=DatabooksBase(a=1)) == 2
+        assert safe_eval_code(code, m=DatabooksBase(a=2)) == 4
+        with pytest.raises(ValueError):
+            safe_eval_code(code, m=[1])
+
 
 def test_affirm(caplog: LogCaptureFixture) -> None:
     """Affirm values in notebooks using string expressions."""
@@ -162,3 +228,65 @@ def test_affirm(caplog: LogCaptureFixture) -> None:
     assert logs[-1].message.endswith(
         " failed [\"any('tags' in c.metadata for c in nb.cells)\"]."
     )
+
+
+def test_affirm_all() -> None:
+    """Compile expressions only once for all notebooks."""
+    with resources.path("tests.files", "demo.ipynb") as nb:
+        exprs = ["len(nb.cells) == 6", "[c.cell_type for c in md_cells] == ['x']"]
+        with patch("databooks.affirm.ast.parse", wraps=ast.parse) as parse:
+            assert affirm_all([nb] * 3, exprs=exprs) == [False] * 3
+        assert parse.call_count == len(exprs)
+        assert affirm(nb, compile_exprs(exprs[:1])) is True
+
+
+def test_affirm__repeated(caplog: LogCaptureFixture) -> None:
+    """Evaluate repeated expressions as separate checks, compiling them once."""
+    caplog.set_level(logging.INFO)
+    with resources.path("tests.files", "demo.ipynb") as nb:
+        exprs = ["len(nb.cells) == 1", "len(nb.cells) == 1", "nb.nbformat == 4"]
+        compiled = compile_exprs(exprs)
+        assert [expr for expr, _ in compiled] == exprs
+        assert compiled[0][1] is compiled[1][1]
+        assert affirm(nb, compiled) is False
+
+    assert caplog.records[-1].message.endswith(" failed 2 of 3 checks.")
+
+
+def test_affirm__invalid(tmp_path: Path) -> None:
+    """Raise errors for notebooks without the fields of their cell types."""
+    nb_path = tmp_path / "test_nb.ipynb"
+    notebook = {
+        "nbformat": 4,
+        "nbformat_minor": 5,
+        "metadata": {},
+        "cells": [{"cell_type": "code", "source": [], "metadata": {}, "outputs": []}],
+    }
+    nb_path.write_text(json.dumps(notebook))
+    with pytest.raises(ValueError, match="Missing fields"):
+        affirm(nb_path, ["len(exec_cells) == 0"])
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "[len(c.outputs.__root__) for c in code_cells]",
+        "[o.output_type for c in code_cells for o in c.outputs.__root__]",
+        "[c.metadata.dict() for c in nb.cells]",
+        "nb.metadata.dict()",
+        "code_cells[0].dict()",
+    ],
+)
+def test_affirm__model_api(expr: str) -> None:
+    """Evaluate expressions with fields and `dict` of models on read-only views."""
+    with resources.path("tests.files", "demo.ipynb") as nb_path:
+        view = JupyterNotebook.load_view(nb_path)
+        notebook = JupyterNotebook.load(nb_path)
+    (_, code), *_ = compile_exprs([expr])
+    results = [
+        safe_eval_code(
+            code, nb=nb, code_cells=[c for c in nb.cells if c.cell_type == "code"]
+        )
+        for nb in (view, notebook)
+    ]
+    assert results[0] == results[1]
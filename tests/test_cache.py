@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from git import Repo
+
+from databooks.cache import CACHE_DIR, NotebookCache, get_cache_dir
+
+
+def test_get_cache_dir(tmp_path: Path) -> None:
+    """Place cache at repo root, or at the common parent of paths outside repos."""
+    nb_dir = tmp_path / "nbs"
+    nb_dir.mkdir()
+    nb_path = nb_dir / "nb.ipynb"
+    nb_path.touch()
+    assert get_cache_dir([nb_path]) == nb_dir / CACHE_DIR
+
+    Repo.init(tmp_path)
+    assert get_cache_dir([nb_path]) == tmp_path / CACHE_DIR
+
+
+def test_notebook_cache(tmp_path: Path) -> None:
+    """Keys depend on contents and options, and persist across cache instances."""
+    nb_path = tmp_path / "nb.ipynb"
+    nb_path.write_text("{}")
+
+    cache = NotebookCache(tmp_path / CACHE_DIR, name="test")
+    key = cache.key(nb_path, keep=["a", "b"])
+    assert key == cache.key(nb_path, keep=["b", "a"])
+    assert key != cache.key(nb_path, keep=["a"])
+    assert key not in cache
+
+    cache.add(key)
+    cache.save()
+    assert key in NotebookCache(tmp_path / CACHE_DIR, name="test")
+    assert (tmp_path / CACHE_DIR / ".gitignore").is_file()
+
+    nb_path.write_text('{"a": 1}')
+    assert cache.key(nb_path, keep=["a", "b"]) not in cache
+
+
+def test_notebook_cache__eviction(tmp_path: Path) -> None:
+    """Evict least recently used entries when cache is full."""
+    cache = NotebookCache(tmp_path, name="test", max_entries=2)
+    cache.add("a")
+    cache.add("b")
+    assert "a" in cache  # `b` is now the least recently used
+    cache.add("c")
+
+    assert len(cache) == 2
+    assert "b" not in cache
+    assert "a" in cache
+    assert "c" in cache
+
+
+def test_notebook_cache__corrupted(tmp_path: Path) -> None:
+    """Ignore manifests that cannot be read."""
+    (tmp_path / "test.json").write_text("not json")
+    assert len(NotebookCache(tmp_path, name="test")) == 0
@@ -5,7 +5,7 @@ from pathlib import Path
 from textwrap import dedent
 
 from _pytest.logging import LogCaptureFixture
-from git import GitCommandError
+from git import GitCommandError, Repo
 from pytest import raises
 from typer import Context
 from typer.core import TyperCommand
@@ -177,6 +177,61 @@ def test_meta__confirm(tmp_path: Path) -> None:
     )
 
 
+def test_meta__gitignore(tmp_path: Path, caplog: LogCaptureFixture) -> None:
+    """Skip git-ignored notebooks unless passing `--no-gitignore`."""
+    caplog.set_level(logging.INFO)
+    git_repo = Repo.init(path=tmp_path)
+    (tmp_path / ".gitignore").write_text(".ipynb_checkpoints/\n")
+    nb_path = tmp_path / "test_meta_nb.ipynb"
+    checkpoint_path = tmp_path / ".ipynb_checkpoints" / "test_meta_nb.ipynb"
+    checkpoint_path.parent.mkdir()
+    for path in (nb_path, checkpoint_path):
+        TestJupyterNotebook().jupyter_notebook.write(path)
+    git_repo.git.add(nb_path)
+
+    result = runner.invoke(app, ["meta", str(tmp_path), "--check", "--no-cache"])
+    assert result.exit_code == 1
+    assert caplog.records[-1].message == "Found unwanted metadata in 1 out of 1 files."
+
+    result = runner.invoke(
+        app, ["meta", str(tmp_path), "--check", "--no-cache", "--no-gitignore"]
+    )
+    assert result.exit_code == 1
+    assert caplog.records[-1].message == "Found unwanted metadata in 2 out of 2 files."
+
+
+def test_meta__changed(tmp_path: Path, caplog: LogCaptureFixture) -> None:
+    """Only check notebooks changed since a git reference or staged."""
+    caplog.set_level(logging.INFO)
+    git_repo = Repo.init(path=tmp_path)
+    nb_paths = [tmp_path / f"test_meta_nb_{i}.ipynb" for i in range(3)]
+    for nb_path in nb_paths:
+        TestJupyterNotebook().jupyter_notebook.write(nb_path)
+    git_repo.git.add(".")
+    git_repo.git.commit("-m", "Initial commit")
+
+    nb_paths[1].write_text(nb_paths[1].read_text() + "\n")
+    nb_paths[2].write_text(nb_paths[2].read_text() + "\n")
+    git_repo.git.add(nb_paths[2])
+
+    cmd = ["meta", str(tmp_path), "--check", "--no-cache"]
+    runner.invoke(app, cmd + ["--changed-since", "HEAD"])
+    assert caplog.records[-1].message == "Found unwanted metadata in 2 out of 2 files."
+
+    runner.invoke(app, cmd + ["--staged"])
+    assert caplog.records[-1].message == "Found unwanted metadata in 1 out of 1 files."
+
+    result = runner.invoke(app, ["meta", str(nb_paths[0]), "--check", "--staged"])
+    assert result.exit_code == 0
+    assert caplog.records[-1].message == (
+        f"No notebooks found in {[nb_paths[0]]}. Nothing to do."
+    )
+
+    result = runner.invoke(app, cmd + ["--staged", "--changed-since", "HEAD"])
+    assert result.exit_code == 2
+    assert "Cannot use both `--changed-since` and `--staged`." in result.output
+
+
 def test_meta__no_notebooks_found(tmp_path: Path, caplog: LogCaptureFixture) -> None:
     """Log that no notebook was found in the paths passed."""
     caplog.set_level(logging.INFO)
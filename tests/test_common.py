@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from databooks.common import find_obj
+from databooks.common import expand_paths, find_obj
 
 
 def test_find_obj(tmp_path: Path) -> None:
@@ -27,3 +27,32 @@ def test_find_obj__missing(tmp_path: Path) -> None:
 
     filepath = find_obj(obj_name=filename, start=start_dir, finish=end_dir)
     assert filepath is None
+
+
+def test_expand_paths(tmp_path: Path) -> None:
+    """Expand directories into notebook paths, pruning ignored directories."""
+    nb_paths = [
+        tmp_path / "nb.ipynb",
+        tmp_path / "to" / "nb.ipynb",
+        tmp_path / "data" / "nb.ipynb",
+        tmp_path / "data" / "more" / "nb.ipynb",
+        tmp_path / "to" / "data" / "nb.ipynb",
+        tmp_path / "to" / "ignored_nb.ipynb",
+    ]
+    for nb_path in nb_paths:
+        nb_path.parent.mkdir(parents=True, exist_ok=True)
+        nb_path.touch()
+    (tmp_path / "script.py").touch()
+
+    assert set(expand_paths(paths=[tmp_path]) or []) == set(nb_paths)
+    assert expand_paths(paths=[tmp_path], ignore=["data/*", "ignored_*"]) == [
+        tmp_path / "nb.ipynb",
+        tmp_path / "to" / "nb.ipynb",
+    ]
+    assert expand_paths(paths=[tmp_path / "to", tmp_path / "to" / "nb.ipynb"]) == [
+        tmp_path / "to" / "data" / "nb.ipynb",
+        tmp_path / "to" / "ignored_nb.ipynb",
+        tmp_path / "to" / "nb.ipynb",
+    ]
+    assert expand_paths(paths=[tmp_path / "missing.ipynb"]) == []
+    assert expand_paths(paths=[]) is None
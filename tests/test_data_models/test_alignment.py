@@ -0,0 +1,67 @@
+"""Test alignment of sequences (of notebook cells)."""
+import random
+from difflib import SequenceMatcher
+from typing import List
+
+import pytest
+
+from databooks.data_models.alignment import (
+    DiffAlgorithm,
+    Opcode,
+    get_opcodes,
+    patience_opcodes,
+)
+
+
+def apply_opcodes(a: str, b: str, opcodes: List[Opcode]) -> str:
+    """Rebuild `b` from `a` with opcodes, checking that they are contiguous."""
+    rebuilt, i, j = "", 0, 0
+    for tag, i1, i2, j1, j2 in opcodes:
+        assert (i1, j1) == (i, j)
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+        rebuilt += a[i1:i2] if tag == "equal" else b[j1:j2]
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return rebuilt
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("", ""),
+        ("abc", ""),
+        ("", "abc"),
+        ("abc", "abc"),
+        ("abcd", "axcd"),
+        ("abcabc", "cbacba"),
+        ("aaabbb", "bbbaaa"),
+    ],
+)
+def test_patience_opcodes(a: str, b: str) -> None:
+    """Get opcodes that turn `a` into `b`."""
+    assert apply_opcodes(a, b, patience_opcodes(a, b)) == b
+
+
+def test_patience_opcodes__random() -> None:
+    """Get valid opcodes and merge adjacent opcodes with the same tag."""
+    rng = random.Random(0)
+    for _ in range(200):
+        a = "".join(rng.choices("abcdefgh", k=rng.randint(0, 30)))
+        b = "".join(rng.choices("abcdefgh", k=rng.randint(0, 30)))
+        opcodes = patience_opcodes(a, b)
+        assert apply_opcodes(a, b, opcodes) == b
+        assert all(t1 != t2 for (t1, *_), (t2, *_) in zip(opcodes, opcodes[1:]))
+
+
+def test_patience_opcodes__moved_block() -> None:
+    """Align on unique elements, like `difflib`, when blocks are added or removed."""
+    a = [f"cell {i}" for i in range(100)]
+    b = a[:40] + ["new cell"] + a[50:]
+    assert patience_opcodes(a, b) == SequenceMatcher(a=a, b=b).get_opcodes()
+
+
+@pytest.mark.parametrize("algorithm", list(DiffAlgorithm))
+def test_get_opcodes__empty(algorithm: DiffAlgorithm) -> None:
+    """Keep one (empty) group when comparing empty sequences."""
+    assert get_opcodes([], [], algorithm=algorithm) == [("equal", 0, 0, 0, 0)]
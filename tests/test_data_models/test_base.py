@@ -1,4 +1,8 @@
-from databooks.data_models.base import DatabooksBase
+from databooks.data_models.base import (
+    _DIFF_MODELS_MAX_SIZE,
+    DatabooksBase,
+    _diff_model,
+)
 
 
 def test_base_sub() -> None:
@@ -24,3 +28,28 @@ def test_base_sub() -> None:
     assert diff.resolve(keep_first=True, ignore_none=False) == DatabooksBase(
         test=0, foo=1, bar="2", baz=None
     )
+
+
+def test_base_sub__cached_model() -> None:
+    """Reuse the 'diff model' class for the same model type and fields."""
+    model_1 = DatabooksBase(test=0, nested=DatabooksBase(values=[1, 2]))
+    model_2 = DatabooksBase(test=1, nested=DatabooksBase(values=[3]))
+
+    diff = model_1 - model_2
+    assert type(diff) is type(model_2 - model_1)
+    assert type(diff) is not type(model_1 - DatabooksBase(test=0, foo=1))
+    assert dict(diff.nested)["values"][0] is model_1.nested.values  # type: ignore
+
+
+def test_base_sub__bounded_cache() -> None:
+    """Keep a bounded number of 'diff model' classes for models of varying fields."""
+    for idx in range(_DIFF_MODELS_MAX_SIZE + 1):
+        DatabooksBase(test=0) - DatabooksBase(**{f"field_{idx}": idx})
+    assert _diff_model.cache_info().currsize == _DIFF_MODELS_MAX_SIZE
+
+
+def test_base__extra_fields_order() -> None:
+    """Keep extra fields of validated models in the order they are passed."""
+    fields = [f"field_{idx}" for idx in range(20)][::-1]
+    model = DatabooksBase.parse_obj({field: 0 for field in fields})
+    assert list(dict(model)) == fields
@@ -8,7 +8,10 @@ from typing import List, Tuple
 
 import pytest
 from _pytest.logging import LogCaptureFixture
+from pydantic import ValidationError
+from rich.columns import Columns
 
+from databooks.data_models.alignment import DiffAlgorithm
 from databooks.data_models.cell import (
     CellMetadata,
     CellOutputs,
@@ -22,6 +25,7 @@ from databooks.data_models.notebook import (
     JupyterNotebook,
     NotebookMetadata,
 )
+from databooks.json_stream import LazyDict, LazyList
 
 
 class TestNotebookMetadata:
@@ -122,6 +126,21 @@ class TestCell:
             "Ignoring removal of required fields ['source'] in `CodeCell`."
         )
 
+    def test_clear__removed(self) -> None:
+        """Report whether clearing fields changed the `CodeCell`."""
+        cell = self.cell
+
+        assert cell.clear_fields(cell_metadata_keep=[], cell_remove_fields=["outputs"])
+        assert not cell.clear_fields(
+            cell_metadata_keep=[], cell_remove_fields=["outputs"]
+        )
+        assert cell.clear_fields(
+            cell_metadata_remove=[], cell_remove_fields=["execution_count"]
+        )
+        assert not cell.clear_fields(
+            cell_metadata_remove=[], cell_remove_fields=["execution_count"]
+        )
+
     def test_cells_sub(self) -> None:
         """Get the diff from different `Cells`."""
         dl1 = Cells[Cell]([self.cell])
@@ -135,6 +154,70 @@ class TestCell:
             [([self.cell], [self.cell]), ([], [self.cell])]
         )
 
+    def test_cells_diff__patience(self) -> None:
+        """Get the same diff with patience alignment as with `difflib`."""
+        other_cell = self.cell
+        other_cell.source = ["other source"]
+        dl1 = Cells[Cell]([self.cell, other_cell])
+        dl2 = Cells[Cell]([self.cell, other_cell, self.cell])
+
+        assert dl1.diff(dl2, algorithm=DiffAlgorithm.patience) == dl1 - dl2
+        assert dl2.diff(dl1, algorithm=DiffAlgorithm.patience) == dl2 - dl1
+
+    def test_cells_diff__ignore_fields(self) -> None:
+        """Align cells that only differ in ignored fields as equal cells."""
+        other_cell = self.cell
+        other_cell.execution_count = 2
+        new_cell = self.cell
+        new_cell.source = ["new source"]
+        dl1 = Cells[Cell]([self.cell])
+        dl2 = Cells[Cell]([new_cell, other_cell])
+
+        assert dl1.diff(dl2) == Cells(  # type: ignore
+            [([self.cell], [new_cell, other_cell])]
+        )
+        for algorithm in DiffAlgorithm:
+            assert dl1.diff(
+                dl2, algorithm=algorithm, ignore_fields=["execution_count"]
+            ) == Cells(  # type: ignore
+                [([], [new_cell]), ([self.cell], [other_cell])]
+            )
+
+    def test_cells_diff__ignore_fields_resolve(self) -> None:
+        """Neither render nor resolve cells differing in ignored fields as conflicts."""
+        other_cell = self.cell
+        other_cell.execution_count = 2
+        other_cell.id = "other-id"  # type: ignore
+        dl1 = Cells[Cell]([self.cell])
+        dl2 = Cells[Cell]([other_cell])
+
+        diff = dl1.diff(dl2, ignore_fields=["id", "execution_count"])
+        assert diff.resolve() == [self.cell]
+        assert list(diff._get_renderables()) == [self.cell]
+        assert len(dl1.diff(dl2).resolve()) == 5
+        assert isinstance(list(dl1.diff(dl2)._get_renderables())[0], Columns)
+
+    def test_cell_fingerprint(self) -> None:
+        """Get equal fingerprints (and hashes) only for cells with equal contents."""
+        other_cell = self.cell
+        other_cell.outputs.values[0].text = ["other text\n"]  # type: ignore
+
+        assert self.cell.fingerprint() == self.cell.fingerprint()
+        assert self.cell.fingerprint() != other_cell.fingerprint()
+        assert self.cell.fingerprint(ignore_fields=["outputs"]) == (
+            other_cell.fingerprint(ignore_fields=["outputs"])
+        )
+
+    def test_cell_hash(self) -> None:
+        """Get equal hashes for equal cells, like the models' `__eq__`."""
+        other_cell = self.cell
+        other_cell.execution_count = 1.0  # type: ignore
+
+        assert self.cell == other_cell
+        assert hash(self.cell) == hash(other_cell)
+        assert len({self.cell, other_cell}) == 1
+        assert self.cell.fingerprint() != other_cell.fingerprint()
+
     def test_cell_remove_fields(self, caplog: LogCaptureFixture) -> None:
         """Test remove fields with logs."""
         caplog.set_level(logging.DEBUG)
@@ -171,7 +254,12 @@ class TestJupyterNotebook(TestNotebookMetadata, TestCell):
     def test_clear_metadata(self) -> None:
         """Remove metadata specified in JupyterNotebook - cells and notebook levels."""
         notebook = self.jupyter_notebook
-        notebook.clear_metadata(
+        assert notebook.clear_metadata(
+            notebook_metadata_keep=[],
+            cell_metadata_keep=[],
+            cell_remove_fields=["outputs", "execution_count"],
+        )
+        assert not notebook.clear_metadata(
             notebook_metadata_keep=[],
             cell_metadata_keep=[],
             cell_remove_fields=["outputs", "execution_count"],
@@ -352,6 +440,105 @@ def test_parse_file() -> None:
     )
 
 
+def test_parse_raw() -> None:
+    """Deserialize notebooks from `bytes` without decoding them, like from `str`."""
+    with resources.path("tests.files", "demo.ipynb") as nb_path:
+        contents = nb_path.read_bytes()
+        notebook = JupyterNotebook.parse_file(nb_path, encoding="utf8")
+
+    assert JupyterNotebook.parse_raw(contents) == notebook
+    assert JupyterNotebook.parse_raw(contents.decode()) == notebook
+    with pytest.raises(ValidationError):
+        JupyterNotebook.parse_raw(b'{"cells": [}')
+
+
+@pytest.mark.parametrize("validate", (True, False))
+@pytest.mark.parametrize("filename", ("demo.ipynb", "tui-demo.ipynb"))
+def test_load(filename: str, validate: bool) -> None:
+    """Load same models as `parse_file`, choosing them from cell and output types."""
+    with resources.path("tests.files", filename) as nb_path:
+        expected = JupyterNotebook.parse_file(nb_path)
+        notebook = JupyterNotebook.load(nb_path, validate=validate)
+
+    assert notebook == expected
+    assert isinstance(notebook.cells, Cells)
+    for cell, expected_cell in zip(notebook.cells, expected.cells):
+        assert type(cell) is type(expected_cell)
+        assert type(cell.metadata) is CellMetadata
+        if isinstance(cell, CodeCell):
+            assert [type(o) for o in cell.outputs.values] == [
+                type(o) for o in expected_cell.outputs.values
+            ]
+
+
+def test_load__lazy_outputs(tmp_path: Path) -> None:
+    """Only deserialize payloads of large outputs when accessed, else copy them."""
+    with resources.path("tests.files", "demo.ipynb") as nb_path:
+        nb_dict = json.loads(nb_path.read_text(encoding="utf-8"))
+    text = ["é\n"] * 2000
+    nb_dict["cells"][1]["outputs"] = [
+        {"output_type": "stream", "name": "stdout", "text": text},
+        {
+            "output_type": "display_data",
+            "data": {"image/png": "x" * 5000},
+            "metadata": {},
+        },
+    ]
+    nb_path = tmp_path / "notebook.ipynb"
+    nb_path.write_text(json.dumps(nb_dict, indent=1, ensure_ascii=False))
+
+    expected = JupyterNotebook.load(nb_path)
+    notebook = JupyterNotebook.load(nb_path, lazy_outputs=True)
+    lazy_stream, lazy_display = notebook.cells[1].outputs.values
+    assert type(lazy_stream.text) is LazyList and type(lazy_display.data) is LazyDict
+
+    expected.write(tmp_path / "expected.ipynb")
+    notebook.write(tmp_path / "lazy.ipynb")
+    assert (tmp_path / "lazy.ipynb").read_bytes() == (
+        tmp_path / "expected.ipynb"
+    ).read_bytes()
+    assert not lazy_stream.text.is_loaded and not lazy_display.data.is_loaded
+
+    assert notebook == expected
+    assert lazy_stream.text == text
+    assert lazy_display.data.is_loaded
+
+
+def test_load_view() -> None:
+    """Load read-only view with the same fields and values as the models."""
+    with resources.path("tests.files", "demo.ipynb") as nb_path:
+        view = JupyterNotebook.load_view(nb_path)
+        notebook = JupyterNotebook.load(nb_path)
+
+    assert view.nbformat == notebook.nbformat
+    assert dict(view.metadata) == notebook.metadata.dict()
+    for cell_view, cell in zip(view.cells, notebook.cells):
+        assert dict(cell_view.metadata) == cell.metadata.dict()
+        assert cell_view.source == cell.source
+        assert cell_view.cell_type == cell.cell_type
+        if cell.cell_type == "code":
+            assert cell_view.execution_count == cell.execution_count
+            assert cell_view.outputs.dict() == cell.outputs.dict()
+    assert view.dict() == notebook.dict()
+
+
+def test_load__unknown_type(tmp_path: Path) -> None:
+    """Validate cells of unknown types like `parse_file`, even without validation."""
+    nb_path = tmp_path / "notebook.ipynb"
+    nb_path.write_text(
+        json.dumps(
+            {
+                "nbformat": 4,
+                "nbformat_minor": 5,
+                "metadata": {},
+                "cells": [{"cell_type": "unknown", "metadata": {}, "source": ""}],
+            }
+        )
+    )
+    with pytest.raises(ValidationError):
+        JupyterNotebook.load(nb_path, validate=False)
+
+
 def test_write_file(tmp_path: Path) -> None:
     """Check that serialization and deserialization are valid."""
     write_path = tmp_path / "serialized_demo.ipynb"
@@ -363,3 +550,55 @@ def test_write_file(tmp_path: Path) -> None:
     out_json_str = write_path.read_text(encoding="utf-8")
     assert json.loads(in_json_str) == json.loads(out_json_str)
     assert in_json_str != out_json_str
+
+
+def test_write_file__non_finite(tmp_path: Path) -> None:
+    """Write non-finite floats like `json` (instead of `null`)."""
+    read_path, write_path = tmp_path / "read.ipynb", tmp_path / "write.ipynb"
+    contents = json.dumps(
+        {
+            "nbformat": 4,
+            "nbformat_minor": 5,
+            "metadata": {"limits": [float("nan"), -float("inf")]},
+            "cells": [],
+        },
+        indent=2,
+    )
+    read_path.write_text(contents)
+    JupyterNotebook.load(read_path).write(write_path)
+    assert write_path.read_text() == contents
+
+
+def test_write_file__validate(tmp_path: Path) -> None:
+    """Only validate notebook before writing when `validate=True`."""
+    write_path = tmp_path / "invalid.ipynb"
+    notebook = JupyterNotebook.construct(
+        nbformat="four", nbformat_minor=5, metadata=NotebookMetadata(), cells=Cells()
+    )
+    with pytest.raises(ValidationError):
+        notebook.write(write_path)
+    assert not write_path.exists()
+
+    notebook.write(write_path, validate=False)
+    assert json.loads(write_path.read_text())["nbformat"] == "four"
+
+
+def test_write_file__atomic(tmp_path: Path) -> None:
+    """Replace notebooks with temporary files, skipping unchanged notebooks."""
+    write_path = tmp_path / "notebook.ipynb"
+    with resources.path("tests.files", "demo.ipynb") as nb_path:
+        notebook = JupyterNotebook.parse_file(nb_path)
+
+    notebook.write(write_path)
+    write_path.chmod(0o640)
+    inode = write_path.stat().st_ino
+
+    notebook.write(write_path, overwrite=True)
+    assert write_path.stat().st_ino == inode
+
+    notebook.metadata = NotebookMetadata()
+    notebook.write(write_path, overwrite=True)
+    assert write_path.stat().st_ino != inode
+    assert write_path.stat().st_mode & 0o777 == 0o640
+    assert JupyterNotebook.parse_file(write_path) == notebook
+    assert list(tmp_path.iterdir()) == [write_path]
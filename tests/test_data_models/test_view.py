@@ -0,0 +1,115 @@
+from copy import copy
+from typing import Any, List
+
+import pytest
+
+from databooks.data_models.notebook import JupyterNotebook
+from databooks.data_models.view import _VIEW_TYPES_MAX_SIZE, notebook_view, view_type
+
+
+def test_view_type() -> None:
+    """Reuse view classes for the same name and fields."""
+    view = view_type("View", ("a", "count"))((1, 2))
+    assert type(view) is view_type("View", ("a", "count"))
+    assert view.a == 1
+    assert view._get("count") == 2
+    assert dict(view) == {"a": 1, "count": 2}
+    assert ("a", 1) in view and 1 not in view
+    assert view == copy(view) != view_type("View", ("a", "b"))((1, 2))
+    assert repr(view) == "View(a=1, count=2)"
+    with pytest.raises(AttributeError):
+        view.b
+
+
+def test_view_type__bounded_cache() -> None:
+    """Keep a bounded number of view classes for views of varying fields."""
+    for idx in range(_VIEW_TYPES_MAX_SIZE + 1):
+        notebook_view(
+            {
+                "nbformat": 4,
+                "nbformat_minor": 5,
+                "metadata": {f"f{idx}": 0},
+                "cells": [],
+            }
+        )
+    assert view_type.cache_info().currsize == _VIEW_TYPES_MAX_SIZE
+
+
+def test_notebook_view() -> None:
+    """Get views of notebook, its metadata, cells and outputs."""
+    nb = notebook_view(
+        {
+            "nbformat": 4,
+            "nbformat_minor": 5,
+            "metadata": {"kernelspec": {"name": "python3"}},
+            "cells": [
+                {
+                    "cell_type": "code",
+                    "source": ["1"],
+                    "metadata": {"tags": []},
+                    "execution_count": 1,
+                    "outputs": [{"output_type": "stream", "text": ["1"]}],
+                }
+            ],
+        }
+    )
+    assert nb.nbformat == 4
+    assert nb.metadata.kernelspec == {"name": "python3"}
+    (cell,) = nb.cells
+    assert (cell.cell_type, cell.source, cell.execution_count) == ("code", ["1"], 1)
+    assert cell.metadata.tags == []
+    assert cell.outputs.__root__[0].text == ["1"]
+    assert "tags" not in cell.metadata  # iterates over pairs, like the models
+
+
+@pytest.mark.parametrize(
+    "cells, msg",
+    [
+        ([[]], "Expected cell 0 to be a dictionary with `cell_type` in"),
+        ([{"cell_type": "unknown"}], "Expected cell 0 to be a dictionary"),
+        (
+            [{"cell_type": "code", "source": [], "metadata": {}, "outputs": []}],
+            r"Missing fields \['execution_count'\] in cell 0.",
+        ),
+        (
+            [{"cell_type": "raw", "source": None, "metadata": {}}],
+            "Expected cell 0 with `metadata` dictionary and `source` list or string.",
+        ),
+        (
+            [
+                {
+                    "cell_type": "code",
+                    "source": [],
+                    "metadata": {},
+                    "outputs": [[]],
+                    "execution_count": None,
+                }
+            ],
+            "Expected cell 0 with `outputs` list of dictionaries.",
+        ),
+    ],
+)
+def test_notebook_view__invalid(cells: List[Any], msg: str) -> None:
+    """Raise errors for notebooks without the fields of each cell type."""
+    values = {"nbformat": 4, "nbformat_minor": 5, "metadata": {}, "cells": cells}
+    with pytest.raises(ValueError, match=msg):
+        notebook_view(values)
+    with pytest.raises(ValueError, match="Expected notebook with fields"):
+        notebook_view({"metadata": {}, "cells": []})
+
+
+def test_view_eq() -> None:
+    """Compare views to dictionaries, views and models, like `pydantic.BaseModel`."""
+    values = {
+        "nbformat": 4,
+        "nbformat_minor": 5,
+        "metadata": {},
+        "cells": [{"cell_type": "markdown", "source": [], "metadata": {"tags": []}}],
+    }
+    nb, model = notebook_view(values), JupyterNotebook.parse_obj(values)
+    (cell,) = nb.cells
+    assert nb.metadata == {} == model.metadata
+    assert nb.metadata != {"kernelspec": {}}
+    assert cell.metadata == {"tags": []} != {"tags": ["a"]}
+    assert cell == model.cells[0] and model.cells[0] == cell
+    assert nb.metadata == model.metadata and model.metadata == nb.metadata
@@ -1,4 +1,5 @@
 from pathlib import Path
+from unittest.mock import patch
 
 from git import GitCommandError, Repo
 from pytest import raises
@@ -6,13 +7,19 @@ from pytest import raises
 from databooks.data_models.cell import BaseCell, CellMetadata
 from databooks.data_models.notebook import NotebookMetadata
 from databooks.git_utils import (
+    BlobReader,
     ChangeType,
     ConflictFile,
     Contents,
     DiffContents,
+    blob2commit,
+    blobs2commits,
+    get_changed_files,
     get_conflict_blobs,
     get_nb_diffs,
     get_repo,
+    get_repo_files,
+    iter_nb_diffs,
 )
 from tests.test_data_models.test_notebook import TestJupyterNotebook
 
@@ -69,6 +76,55 @@ def test_get_repo_missing(tmp_path: Path) -> None:
     assert get_repo(tmp_path) is None
 
 
+def test_blob_reader(tmp_path: Path) -> None:
+    """Read multiple blobs with the same `git cat-file` process."""
+    git_repo = init_repo_diff(
+        tmp_path=tmp_path,
+        filename=Path("hello.txt"),
+        contents_main="HELLO EVERYONE!",
+        contents_other="hello\nworld\n",
+        commit_message_main="Commit message from main",
+        commit_message_other="Commit message from other",
+    )
+    blob_main = git_repo.commit("main").tree / "hello.txt"
+    blob_other = git_repo.commit("other").tree / "hello.txt"
+
+    with BlobReader(git_repo) as reader:
+        assert reader.read(blob_main) == b"HELLO EVERYONE!"
+        proc = reader.proc
+        assert reader.read(blob_other) == b"hello\nworld\n"
+        assert reader.read(None) is None
+        assert reader.proc is proc
+    assert proc.poll() is not None
+    assert proc.stdin.closed and proc.stdout.closed and proc.stderr.closed
+
+
+def test_blobs2commits(tmp_path: Path) -> None:
+    """Get the same commits as `blob2commit` for multiple blobs at once."""
+    git_repo = init_repo_diff(
+        tmp_path=tmp_path,
+        filename=Path("hello.txt"),
+        contents_main="HELLO EVERYONE!",
+        contents_other="hello world",
+        commit_message_main="Commit message from main",
+        commit_message_other="Commit message from other",
+    )
+    (tmp_path / "other.txt").write_text("other file")
+    git_repo.git.add("other.txt")
+    git_repo.git.commit("-m", "Add other file")
+
+    blobs = [
+        git_repo.commit("main").tree / "hello.txt",
+        git_repo.commit("other").tree / "hello.txt",
+        git_repo.commit("main").tree / "other.txt",
+    ]
+    commits = blobs2commits(blobs, repo=git_repo)
+
+    assert commits == {b.hexsha: blob2commit(blob=b, repo=git_repo) for b in blobs}
+    assert commits[blobs[0].hexsha].endswith("Commit message from main")
+    assert commits[blobs[2].hexsha].endswith("Add other file")
+
+
 def test_get_conflict_blobs(tmp_path: Path) -> None:
     """Return `databooks.git_utils.ConflctFile` from git merge conflict."""
     filepath = Path("hello.txt")
@@ -142,3 +198,131 @@ def test_get_nb_diffs(tmp_path: Path) -> None:
             change_type=ChangeType.M,
         )
     ]
+
+
+def test_get_nb_diffs__pathspec(tmp_path: Path) -> None:
+    """Only get diffs of notebooks (in any directory) when no paths are given."""
+    nb_filepath = Path("nested") / "dir" / "test_notebook.ipynb"
+    git_repo = init_repo_diff(
+        tmp_path=tmp_path,
+        filename=nb_filepath,
+        contents_main="{}",
+        contents_other='{"a": 1}',
+        commit_message_main="Commit message from main",
+        commit_message_other="Commit message from other",
+    )
+    (tmp_path / "script.py").write_text("print('hello')")
+    git_repo.git.add("script.py")
+    (tmp_path / nb_filepath).unlink()
+
+    diffs = get_nb_diffs(repo=git_repo)
+    assert [(d.a.path, d.change_type) for d in diffs] == [(nb_filepath, ChangeType.D)]
+
+    diffs = get_nb_diffs(repo=git_repo, ref_base="main", ref_remote="other")
+    assert [d.a.path for d in diffs] == [nb_filepath]
+
+
+def test_iter_nb_diffs(tmp_path: Path) -> None:
+    """Only read contents of notebook diffs when iterating."""
+    git_repo = init_repo_diff(
+        tmp_path=tmp_path,
+        filename=Path("test_notebook.ipynb"),
+        contents_main="{}",
+        contents_other='{"a": 1}',
+        commit_message_main="Commit message from main",
+        commit_message_other="Commit message from other",
+    )
+
+    with patch.object(BlobReader, "read", autospec=True) as read:
+        diffs = iter_nb_diffs(repo=git_repo, ref_base="main", ref_remote="other")
+        assert len(diffs) == 1
+        read.assert_not_called()
+
+    assert list(diffs) == get_nb_diffs(
+        repo=git_repo, ref_base="main", ref_remote="other"
+    )
+    assert next(iter(diffs)).b.contents == b'{"a": 1}'
+
+    (tmp_path / "test_notebook.ipynb").write_text('{"b": 2}')
+    assert next(iter(iter_nb_diffs(repo=git_repo))).b.contents == b'{"b": 2}'
+
+
+def test_get_repo_files(tmp_path: Path) -> None:
+    """List tracked and untracked files, skipping git-ignored ones."""
+    git_repo = Repo.init(path=tmp_path)
+    (tmp_path / ".gitignore").write_text(".ipynb_checkpoints/\n")
+    for path in ("nb.ipynb", "to/nb.ipynb", "to/.ipynb_checkpoints/nb.ipynb"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).touch()
+    git_repo.git.add("nb.ipynb")
+
+    assert set(get_repo_files(git_repo)) == {
+        tmp_path / ".gitignore",
+        tmp_path / "nb.ipynb",
+        tmp_path / "to" / "nb.ipynb",
+    }
+    assert get_repo_files(git_repo, paths=[tmp_path / "to"]) == [
+        tmp_path / "to" / "nb.ipynb"
+    ]
+
+
+def test_get_repo_files__nested(tmp_path: Path) -> None:
+    """List files of submodules and nested repos from their own repos."""
+    sub_repo = Repo.init(path=tmp_path / "sub_src")
+    (tmp_path / "sub_src" / "sub.ipynb").touch()
+    sub_repo.git.add(".")
+    sub_repo.git.commit("-m", "Initial commit")
+
+    git_repo = Repo.init(path=tmp_path / "main")
+    main_dir = tmp_path / "main"
+    (main_dir / "nb.ipynb").touch()
+    git_repo.git.add(".")
+    git_repo.git.commit("-m", "Initial commit")
+    git_repo.git.execute(
+        ["git", "-c", "protocol.file.allow=always", "submodule", "add"]
+        + [str(tmp_path / "sub_src"), "sub"]
+    )
+    Repo.init(path=main_dir / "nested")
+    (main_dir / "nested" / ".gitignore").write_text("ignored.ipynb\n")
+    for path in ("nested/nb.ipynb", "nested/ignored.ipynb"):
+        (main_dir / path).touch()
+
+    assert set(get_repo_files(git_repo)) == {
+        main_dir / ".gitmodules",
+        main_dir / "nb.ipynb",
+        main_dir / "sub" / "sub.ipynb",
+        main_dir / "nested" / ".gitignore",
+        main_dir / "nested" / "nb.ipynb",
+    }
+    assert get_repo_files(git_repo, paths=[main_dir / "sub" / "sub.ipynb"]) == [
+        main_dir / "sub" / "sub.ipynb"
+    ]
+    assert get_repo_files(git_repo, paths=[main_dir / "nested"]) == [
+        main_dir / "nested" / ".gitignore",
+        main_dir / "nested" / "nb.ipynb",
+    ]
+
+
+def test_get_changed_files(tmp_path: Path) -> None:
+    """Get added and modified files relative to a reference, excluding deleted ones."""
+    git_repo = Repo.init(path=tmp_path)
+    for path in ("same.ipynb", "modified.ipynb", "deleted.ipynb"):
+        (tmp_path / path).touch()
+    git_repo.git.add(".")
+    git_repo.git.commit("-m", "Initial commit")
+
+    (tmp_path / "modified.ipynb").write_text("{}")
+    (tmp_path / "deleted.ipynb").unlink()
+    (tmp_path / "staged.ipynb").touch()
+    git_repo.git.add("staged.ipynb")
+    (tmp_path / "untracked.ipynb").touch()
+
+    assert set(get_changed_files(git_repo)) == {
+        tmp_path / "modified.ipynb",
+        tmp_path / "staged.ipynb",
+        tmp_path / "untracked.ipynb",
+    }
+    assert get_changed_files(git_repo, staged=True) == [tmp_path / "staged.ipynb"]
+    assert get_changed_files(git_repo, "HEAD", paths=[tmp_path / "staged.ipynb"]) == [
+        tmp_path / "staged.ipynb"
+    ]
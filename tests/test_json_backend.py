@@ -0,0 +1,55 @@
+import json
+import mmap
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from databooks.json_backend import dumps, loads
+
+
+@pytest.mark.parametrize(
+    "obj",
+    (
+        {"source": ["print('é')\n", "# 😀\x7f "], "metadata": {}},
+        [0.1, 1e16, 1.5e-07, 1e-05, -0.0, 1.0, 1e300, 5e-324],
+        {"outputs": [{"execution_count": 1, "data": {}}], "empty": []},
+        [2**70, True, None],
+        {"data": [float("nan"), None], "metadata": {"max": -float("inf")}},
+    ),
+)
+def test_dumps(obj: Any) -> None:
+    """Serialize objects byte by byte like `json.dumps` with an indentation of 2."""
+    assert dumps(obj) == json.dumps(obj, indent=2)
+    assert dumps(obj, indent=1) == json.dumps(obj, indent=1)
+    with patch("databooks.json_backend.orjson", None):
+        assert dumps(obj) == json.dumps(obj, indent=2)
+
+
+def test_dumps__default() -> None:
+    """Serialize other objects with `default`, like `json.dumps`."""
+    obj = {"a": {3, 1}}
+    assert dumps(obj, default=sorted) == json.dumps(obj, default=sorted, indent=2)
+    with pytest.raises(TypeError):
+        dumps(obj)
+
+
+def test_loads() -> None:
+    """Deserialize JSON, also when `orjson` rejects the document."""
+    assert loads(b'{"a": [1, "\\u00e9"]}') == {"a": [1, "é"]}
+    assert loads('{"a": 1}') == {"a": 1}
+    assert str(loads("[NaN]")[0]) == "nan"
+    with patch("databooks.json_backend.orjson", None):
+        assert loads('{"a": 1}') == {"a": 1}
+
+
+def test_loads__buffers(tmp_path: Path) -> None:
+    """Deserialize JSON from buffers, also when `orjson` rejects the document."""
+    path = tmp_path / "document.json"
+    path.write_bytes(b'{"a": [1, "\\u00e9"]}')
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        assert loads(buf) == loads(memoryview(buf)) == {"a": [1, "é"]}
+        with patch("databooks.json_backend.orjson", None):
+            assert loads(buf) == {"a": [1, "é"]}
+    assert str(loads(memoryview(b"[NaN]"))[0]) == "nan"
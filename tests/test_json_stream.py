@@ -0,0 +1,154 @@
+import json
+from copy import copy, deepcopy
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from databooks.json_backend import dumps as json_dumps
+from databooks.json_stream import (
+    LazyDict,
+    LazyList,
+    dumps,
+    is_empty,
+    iter_elements,
+    iter_members,
+    iter_objects,
+    load_span,
+    map_file,
+    parse_array,
+    parse_object,
+    read_buffer,
+    small_value_end,
+    value_end,
+)
+
+DOCUMENT = (
+    b' {"a" : [1, {"b": "x\\"]}"}, [] ], "c": {}, "d": null, "e": -1.5e3 ,'
+    b' "f": "\\\\", "g": ["' + b"y" * 1000 + b'\\\\", "\\u00e9"]} '
+)
+
+
+def test_iter_members() -> None:
+    """Get spans of the values, to deserialize them independently."""
+    members = dict(iter_members(DOCUMENT))
+    assert list(members) == ["a", "c", "d", "e", "f", "g"]
+    assert {key: load_span(DOCUMENT, span) for key, span in members.items()} == (
+        json.loads(DOCUMENT)
+    )
+    assert is_empty(DOCUMENT, members["c"])
+    assert not is_empty(DOCUMENT, members["a"])
+
+
+def test_iter_elements() -> None:
+    """Get spans of array elements and members of objects in arrays."""
+    document = b'[{"a": 1}, {}, {"b": [{}, "]"]}]'
+    assert [load_span(document, span) for span in iter_elements(document)] == (
+        json.loads(document)
+    )
+    assert [
+        {key: load_span(document, span) for key, span in members.items()}
+        for members in iter_objects(document)
+    ] == json.loads(document)
+
+
+@pytest.mark.parametrize(
+    "document", [b"", b'{"a": 1', b'{"a" 1}', b'{"a": [1}', b'{"a": "b}', b"[1]"]
+)
+def test_iter_members__invalid(document: bytes) -> None:
+    """Raise errors for invalid objects."""
+    with pytest.raises(ValueError):
+        list(iter_members(document))
+
+
+def test_value_end() -> None:
+    """Skip values, including long strings with escaped quotes."""
+    string = b'"' + b'a\\"' * 10_000 + b'\\\\"'
+    assert value_end(string + b", 1", 0) == len(string)
+    assert value_end(b"[" + string + b"] ", 0) == len(string) + 2
+
+
+def test_parse_object() -> None:
+    """Parse values of some keys while scanning the object only once."""
+    document = b'{"a": [{"b": 1}, {"b": [2]}], "c": [3]}'
+    members, end = parse_object(
+        document, parsers={"a": lambda buf, pos: parse_array(buf, pos, parse_object)}
+    )
+    assert end == len(document)
+    assert list(members) == ["a", "c"]
+    assert [load_span(document, o["b"]) for o in members["a"]] == [1, [2]]
+    assert load_span(document, members["c"]) == [3]
+
+
+def test_small_value_end() -> None:
+    """Get the end of values only if they are smaller than the given size."""
+    document = b'[{"a": "bcd"}, 12345]'
+    assert small_value_end(document, 1, 13) == 13
+    assert small_value_end(document, 1, 12) is None
+    assert small_value_end(document, 15, 10) == 20
+    assert small_value_end(document, 15, 3) is None
+
+
+def test_lazy_values() -> None:
+    """Only deserialize lazy values when accessed."""
+    members = dict(iter_members(DOCUMENT))
+    data = LazyDict.from_span(DOCUMENT, members["c"])
+    text = LazyList.from_span(DOCUMENT, members["g"])
+    assert not data.is_loaded and not text.is_loaded
+    assert LazyDict.from_span(DOCUMENT, members["d"]) is None
+
+    text_copy = deepcopy(text)
+    assert text == ["y" * 1000 + "\\", "é"] and text.is_loaded
+    assert not text_copy.is_loaded and text_copy == text
+
+    data_copy = copy(data)
+    data["k"] = 1
+    assert data == {"k": 1} and data_copy == {}
+
+
+def test_dumps() -> None:
+    """Write lazy values verbatim if they were not accessed, indented as `dumps`."""
+    value = {"a": {"b": ["c\n", "é"]}, "d": {}, "e": {"f": 1}}
+    document = json.dumps({"x": value}, indent=1, ensure_ascii=False).encode()
+    ((_, span),) = iter_members(document)
+    lazy = {key: LazyDict(document, s) for key, s in iter_members(document, span[0])}
+
+    assert dumps([lazy]) == json_dumps([value])
+    assert not any(v.is_loaded for v in lazy.values())
+    assert dumps([lazy], indent=1) == json_dumps([value], indent=1)
+
+    lazy["e"]["f"] = 2
+    assert dumps(lazy) == json_dumps({**value, "e": {"f": 2}})
+    compact = b'{"a": {"b": 1}}'
+    assert dumps([LazyDict(compact, (0, len(compact)))]) == json_dumps(
+        [{"a": {"b": 1}}]
+    )
+
+
+def test_map_file(tmp_path: Path) -> None:
+    """Map files (but not empty ones, that cannot be mapped)."""
+    path = tmp_path / "document.json"
+    path.write_bytes(DOCUMENT)
+    with map_file(path) as buf:
+        assert dict(iter_members(buf)) == dict(iter_members(DOCUMENT))
+
+    assert buf.closed  # type: ignore[union-attr]
+
+    path.write_bytes(b"")
+    with map_file(path) as buf:
+        assert buf == b""
+
+
+def test_read_buffer(tmp_path: Path) -> None:
+    """Keep map of file contents, also after the file is replaced."""
+    path = tmp_path / "document.json"
+    path.write_bytes(DOCUMENT)
+    buf = read_buffer(path)
+    lazy = LazyDict(buf, (1, len(DOCUMENT) - 1))
+    del buf
+
+    path.with_suffix(".tmp").write_bytes(b"{}")
+    path.with_suffix(".tmp").replace(path)
+    assert lazy.data == json.loads(DOCUMENT)
+    with patch("databooks.json_stream.MAP_FILES", False):
+        assert read_buffer(path) == b"{}"
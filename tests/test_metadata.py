@@ -1,11 +1,19 @@
+import json
 import logging
+import shutil
+from importlib import resources
 from pathlib import Path
+from typing import Any, Dict
+from unittest.mock import patch
 
+import pytest
 from _pytest.logging import LogCaptureFixture
+from pydantic import ValidationError
 
+from databooks.cache import CACHE_DIR, NotebookCache
 from databooks.data_models.cell import CellMetadata, CellOutputs
 from databooks.data_models.notebook import JupyterNotebook
-from databooks.metadata import clear
+from databooks.metadata import ClearEngine, clear, clear_all, clear_dict
 from tests.test_data_models.test_notebook import TestJupyterNotebook
 
 
@@ -39,6 +47,18 @@ def test_metadata_clear__check_verbose(
     )
 
 
+@pytest.mark.parametrize("check", [True, False])
+def test_metadata_clear__invalid(tmp_path: Path, check: bool) -> None:
+    """Validate notebooks with the model engine, also when only checking them."""
+    read_path = tmp_path / "test_nb.ipynb"
+    notebook = TestJupyterNotebook().jupyter_notebook.dict()
+    notebook["extra"] = 1
+    read_path.write_text(json.dumps(notebook))
+
+    with pytest.raises(ValidationError):
+        clear(read_path, check=check)
+
+
 def test_metadata_clear(tmp_path: Path) -> None:
     """Clear metadata from a notebook and write clean notebook."""
     read_path = tmp_path / "test_nb.ipynb"  # type: ignore
@@ -82,3 +102,189 @@ def test_metadata_clear(tmp_path: Path) -> None:
         for cell in nb_write.cells
         if cell.cell_type != "code"
     )
+
+
+@pytest.mark.parametrize(
+    "filename", ["demo.ipynb", "bad-demo.ipynb", "clean.ipynb", "tui-demo.ipynb"]
+)
+@pytest.mark.parametrize(
+    "clear_kwargs",
+    [
+        {},
+        {"cell_fields_keep": ["outputs"]},
+        {"cell_fields_keep": ["outputs", "execution_count", "id"]},
+        {"notebook_metadata_keep": ["kernelspec"], "cell_metadata_keep": ["tags"]},
+    ],
+)
+@pytest.mark.parametrize("engine", [ClearEngine.raw, ClearEngine.stream])
+def test_metadata_clear__engine(
+    tmp_path: Path, filename: str, clear_kwargs: Dict[str, Any], engine: ClearEngine
+) -> None:
+    """Clear notebooks like their models, and write the same notebooks."""
+    with resources.path("tests.files", filename) as nb_path:
+        shutil.copy(nb_path, tmp_path / filename)
+    read_path = tmp_path / filename
+    model_path, engine_path = tmp_path / "model.ipynb", tmp_path / "engine.ipynb"
+
+    for check in (True, False):
+        assert clear(
+            read_path, model_path, check=check, engine=ClearEngine.model, **clear_kwargs
+        ) == clear(read_path, engine_path, check=check, engine=engine, **clear_kwargs)
+    assert model_path.exists() == engine_path.exists()
+    if model_path.exists():
+        assert engine_path.read_bytes() == model_path.read_bytes()
+
+
+@pytest.mark.parametrize("engine", [ClearEngine.raw, ClearEngine.stream])
+def test_metadata_clear__engine_fields_order(
+    tmp_path: Path, engine: ClearEngine
+) -> None:
+    """Write cell fields in the same order as the models - declared fields first."""
+    read_path = tmp_path / "test_nb.ipynb"
+    model_path, engine_path = tmp_path / "model.ipynb", tmp_path / "engine.ipynb"
+    notebook = TestJupyterNotebook().jupyter_notebook.dict()
+    notebook["cells"] = [
+        {
+            "foo": 1,
+            "outputs": [],
+            "cell_type": "code",
+            "bar": 2,
+            "execution_count": None,
+            "metadata": {"tags": []},
+            "source": [],
+            "id": "a",
+        },
+        {"source": [], "foo": 1, "cell_type": "markdown", "metadata": {}},
+    ]
+    read_path.write_text(json.dumps(notebook))
+
+    clear(read_path, model_path, cell_fields_keep=["foo"])
+    clear(read_path, engine_path, cell_fields_keep=["foo"], engine=engine)
+    assert engine_path.read_bytes() == model_path.read_bytes()
+    assert [list(cell) for cell in json.loads(model_path.read_text())["cells"]] == [
+        ["metadata", "source", "cell_type", "outputs", "foo", "execution_count"],
+        ["metadata", "source", "cell_type", "foo"],
+    ]
+
+
+def test_clear_dict() -> None:
+    """Keep code cells valid when removing fields, like the cell models."""
+    notebook = {
+        "nbformat": 4,
+        "nbformat_minor": 5,
+        "metadata": {"kernelspec": {}},
+        "cells": [
+            {"cell_type": "code", "id": "a", "metadata": {}, "source": []},
+            {"cell_type": "markdown", "metadata": {"tags": []}, "source": []},
+            {
+                "cell_type": "code",
+                "execution_count": None,
+                "metadata": {},
+                "outputs": [],
+                "source": [],
+            },
+        ],
+    }
+    model = JupyterNotebook.from_dict(json.loads(json.dumps(notebook)), validate=False)
+
+    assert clear_dict(notebook)
+    assert model.clear_metadata(
+        notebook_metadata_keep=(),
+        cell_metadata_keep=(),
+        cell_remove_fields=["id", "execution_count", "outputs"],
+    )
+    assert notebook == model.dict()
+    assert not clear_dict(notebook)
+
+
+@pytest.mark.parametrize(
+    "engine, msg",
+    [(ClearEngine.raw, "as a dictionary"), (ClearEngine.stream, "incrementally")],
+)
+def test_metadata_clear__engine_fallback(
+    tmp_path: Path, caplog: LogCaptureFixture, engine: ClearEngine, msg: str
+) -> None:
+    """Clear notebooks with unknown cell types with their models (and fail)."""
+    caplog.set_level(logging.DEBUG)
+    read_path = tmp_path / "test_nb.ipynb"
+    notebook = TestJupyterNotebook().jupyter_notebook.dict()
+    notebook["cells"][0]["cell_type"] = "unknown"
+    read_path.write_text(json.dumps(notebook))
+
+    with pytest.raises(ValueError, match="unknown"):
+        clear(read_path, check=True, engine=engine)
+    assert caplog.records[-1].message == (
+        f"Cannot clear {read_path} {msg} - using its model."
+    )
+
+
+@pytest.mark.parametrize("engine", list(ClearEngine))
+def test_metadata_clear__engine_kwargs(
+    tmp_path: Path, caplog: LogCaptureFixture, engine: ClearEngine
+) -> None:
+    """Pass extra arguments to the notebook model, regardless of the engine."""
+    caplog.set_level(logging.DEBUG)
+    read_path = tmp_path / "test_nb.ipynb"
+    TestJupyterNotebook().jupyter_notebook.write(read_path)
+
+    with pytest.raises(ValueError, match="Exactly one of `cell_metadata_keep`"):
+        clear(read_path, check=True, engine=engine, cell_metadata_remove=["tags"])
+    if engine is not ClearEngine.model:  # type: ignore[attr-defined]
+        assert caplog.records[-1].message == (
+            f"Cannot clear {read_path} with `{engine.value}` engine and arguments"
+            " ['cell_metadata_remove'] - using its model."
+        )
+
+
+def test_metadata_clear_all__jobs(tmp_path: Path) -> None:
+    """Clear notebooks in parallel and return the checks in the input order."""
+    read_paths = [tmp_path / f"test_nb_{i}.ipynb" for i in range(4)]
+    for read_path in read_paths:
+        TestJupyterNotebook().jupyter_notebook.write(read_path)
+    clear(
+        read_path=read_paths[2],
+        write_path=read_paths[2],
+        cell_fields_keep=["outputs"],
+        overwrite=True,
+    )
+
+    clear_kwargs: Dict[str, Any] = dict(
+        read_paths=read_paths,
+        write_paths=read_paths,
+        cell_fields_keep=["outputs"],
+        check=True,
+    )
+    assert clear_all(**clear_kwargs, jobs=2) == [False, False, True, False]
+
+    # Notebooks are cleared in the current process by default
+    with patch("databooks.metadata.ProcessPoolExecutor") as executor:
+        assert clear_all(**clear_kwargs) == [False, False, True, False]
+    executor.assert_not_called()
+
+
+def test_metadata_clear_all__cache(tmp_path: Path) -> None:
+    """Skip notebooks that were found clean in previous runs."""
+    read_path = tmp_path / "test_nb.ipynb"
+    TestJupyterNotebook().jupyter_notebook.write(read_path)
+    cache_dir = tmp_path / CACHE_DIR
+    clear_kwargs = dict(
+        read_paths=[read_path],
+        write_paths=[read_path],
+        jobs=1,
+        cache_dir=cache_dir,
+        cell_fields_keep=["outputs"],
+    )
+
+    assert clear_all(**clear_kwargs, check=True) == [False]  # type: ignore
+    assert len(NotebookCache(cache_dir, name="meta")) == 0
+    assert clear_all(**clear_kwargs, overwrite=True) == [False]  # type: ignore
+    assert len(NotebookCache(cache_dir, name="meta")) == 1
+
+    # Cached notebooks are not parsed again
+    with patch.object(JupyterNotebook, "load") as load:
+        assert clear_all(**clear_kwargs, check=True) == [True]  # type: ignore
+    load.assert_not_called()
+
+    # Different options invalidate the cache
+    clear_kwargs["cell_fields_keep"] = []
+    assert clear_all(**clear_kwargs, check=True) == [False]  # type: ignore